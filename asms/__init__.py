@@ -0,0 +1,20 @@
+"""Assembly station monitoring: the station engines and their tools behind the `python -m asms` CLI.
+
+asms.core runs one station on threads, asms.station several on asyncio;
+both keep their records through asms.jobs. Submodules are imported on first
+use, so `import asms` (or the CLI's --help) loads neither the station core
+nor gpiozero.
+"""
+import importlib
+
+__all__ = [
+    "bench", "camera", "camera_sim", "checkpoint", "cli", "coincidence", "core", "eventlog", "historydb",
+    "jobs", "kpi", "log_analytics", "plugins", "profiling", "recipes", "retry_scheduler", "stage_metrics",
+    "station", "trigger_trace", "triggers",
+]
+
+
+def __getattr__(name):
+    if name in __all__:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,3 @@
+from asms.cli import main
+
+main()
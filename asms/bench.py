@@ -0,0 +1,218 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from asms import eventlog, historydb
+from asms.camera_sim import add_simulator_args, simulator_from_args
+from asms.station import Station, StationConfig
+
+# ------------------------
+# Results
+# ------------------------
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * q / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(engine, latencies_ms, elapsed, retries, sims):
+    ordered = sorted(latencies_ms)
+    return {
+        "engine": engine,
+        "jobs": len(ordered),
+        "elapsed_s": round(elapsed, 3),
+        "jobs_per_hour": round(len(ordered) / elapsed * 3600, 1) if elapsed else None,
+        "p50_ms": round(percentile(ordered, 50), 3) if ordered else None,
+        "p95_ms": round(percentile(ordered, 95), 3) if ordered else None,
+        "p99_ms": round(percentile(ordered, 99), 3) if ordered else None,
+        "mean_ms": round(statistics.fmean(ordered), 3) if ordered else None,
+        "retries": retries,
+        "cameras": len(sims),
+        "camera": {key: sum(sim.stats[key] for sim in sims) for key in sims[0].stats},
+    }
+
+
+# ------------------------
+# Engines
+# ------------------------
+async def bench_station(sims, parts, part_gap, jobs, workdir, result_timeout):
+    # More than one simulator benchmarks a multi-camera station, one camera each
+    sim = sims[0]
+    cameras = [{"name": f"cam{i + 1}", "camera_ip": s.host, "command_port": s.port, "result_port": s.port}
+               for i, s in enumerate(sims)] if len(sims) > 1 else []
+    config = StationConfig(
+        name="bench", camera_ip=sim.host, command_port=sim.port, result_port=sim.port,
+        operator="bench", jobs=jobs, result_timeout=result_timeout, cameras=cameras,
+        checkpoint=os.path.join(workdir, "bench.checkpoint.json"), trigger_ack=sim.trigger_ack)
+    station = Station(config, events=eventlog.EventLog(os.path.join(workdir, "bench_events.jsonl")),
+                      history=historydb.HistoryStore(os.path.join(workdir, "bench_history.db")))
+
+    done = None
+    attempts = []
+    run_job = station.run_part if cameras else station.run_job
+    triggers = lambda: sum(s.stats["triggers"] for s in sims)
+
+    async def timed_run_job(step, attempt=0):
+        before = triggers()
+        result = await run_job(step, attempt)
+        attempts.append(triggers() - before)
+        done.set_result(time.perf_counter())
+        return result
+
+    if cameras:
+        station.run_part = timed_run_job
+    else:
+        station.run_job = timed_run_job
+    await station.start()
+    runner = asyncio.ensure_future(station.run())
+
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(parts):
+        done = asyncio.get_running_loop().create_future()
+        fired = time.perf_counter()
+        station.edge(1)
+        station.edge(2)
+        latencies.append((await done - fired) * 1000)
+        # Let the station finish its bookkeeping (and preload) before the next part
+        while not station.detector.armed or station.loaded_job != station.current_job:
+            await asyncio.sleep(0)
+        if part_gap:
+            await asyncio.sleep(part_gap)
+    elapsed = time.perf_counter() - start
+
+    runner.cancel()
+    await station.close()
+    return latencies, elapsed, sum(attempts) - len(attempts) * len(sims)
+
+
+def bench_update(sim, parts, part_gap, jobs, workdir, result_timeout, transport="tcp", event_log="jsonl"):
+    # Drives the station core's own handlers and run_job() the way its main() does
+    from asms import core, plugins
+    from asms.coincidence import CoincidenceDetector
+
+    core.LOG_FILE = None
+    core.events = plugins.resolve("event_log", event_log)(os.path.join(workdir, "bench_events.jsonl"), {}).start()
+    core.history = historydb.HistoryStore(os.path.join(workdir, "bench_history.db")).start()
+    core.operator_name = "bench"
+    core.RECIPE_FILE = os.path.join(workdir, "recipes.json")
+    with open(core.RECIPE_FILE, "w") as f:
+        json.dump({"recipes": [{"name": "bench", "jobs": jobs, "result_timeout": result_timeout}]}, f)
+    core.load_recipe_tables()
+    core.open_book()
+    core.detector = CoincidenceDetector(core.PAIR_WINDOW, core.on_pair)
+    core.camera = plugins.resolve("transport", transport)(sim.host, sim.port, sim.port, trigger_ack=sim.trigger_ack)
+    core.camera.start(5)
+    core.switch_job(core.book.step)
+
+    latencies = []
+    retries = 0
+    start = time.perf_counter()
+    for _ in range(parts):
+        before = sim.stats["triggers"]
+        fired = time.perf_counter()
+        core.on_trigger1()
+        core.on_trigger2()
+        core.trigger_received.wait()
+        core.trigger_received.clear()
+        job_number = core.book.current_job
+        passed = core.run_job(core.book.step)
+        latencies.append((time.perf_counter() - fired) * 1000)
+        retries += sim.stats["triggers"] - before - 1
+        core.after_job(job_number, passed)
+        if part_gap:
+            time.sleep(part_gap)
+    elapsed = time.perf_counter() - start
+
+    core.camera.close()
+    core.events.close()
+    core.history.close()
+    return latencies, elapsed, retries
+
+
+async def run_benchmark(args):
+    sims = [await simulator_from_args(args).start()]
+    for i in range(1, args.cameras):
+        # Independent verdict streams per camera, still repeatable under --seed
+        args_i = argparse.Namespace(**vars(args))
+        if args.seed is not None:
+            args_i.seed = args.seed + i
+        sims.append(await simulator_from_args(args_i).start())
+    sim = sims[0]
+    with tempfile.TemporaryDirectory() as workdir:
+        quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+        with quiet:
+            if args.engine == "station":
+                latencies, elapsed, retries = await bench_station(
+                    sims, args.parts, args.part_gap, args.jobs, workdir, args.result_timeout)
+            else:
+                # The station core is blocking; keep the simulator's loop free while it runs
+                result = {}
+                worker = threading.Thread(target=lambda: result.update(out=bench_update(
+                    sim, args.parts, args.part_gap, args.jobs, workdir, args.result_timeout,
+                    args.transport, args.event_log)))
+                worker.start()
+                while worker.is_alive():
+                    await asyncio.sleep(0.01)
+                latencies, elapsed, retries = result["out"]
+    for s in sims:
+        await s.close()
+    return summarize(args.engine, latencies, elapsed, retries, sims)
+
+
+def print_summary(summary):
+    print(f"[Bench] engine={summary['engine']}  cameras={summary['cameras']}  jobs={summary['jobs']}  "
+          f"elapsed={summary['elapsed_s']}s")
+    print(f"[Bench] throughput: {summary['jobs_per_hour']} jobs/hour")
+    print(f"[Bench] trigger-to-verdict: p50={summary['p50_ms']} ms  p95={summary['p95_ms']} ms  "
+          f"p99={summary['p99_ms']} ms  mean={summary['mean_ms']} ms")
+    print(f"[Bench] retries: {summary['retries']}  camera: {summary['camera']}")
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="End-to-end station benchmark against the camera simulator")
+    parser.add_argument("--engine", choices=("station", "update"), default="station",
+                        help="asms.station (asyncio) or the asms.core single-station loop (threads)")
+    parser.add_argument("--parts", type=int, default=300, help="parts to inspect")
+    parser.add_argument("--part-gap", type=float, default=0.0, help="seconds between parts (operator loading time)")
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1, 2, 3], help="job sequence to inspect")
+    parser.add_argument("--cameras", type=int, default=1,
+                        help="simulated cameras inspecting each part in parallel (station engine only)")
+    parser.add_argument("--result-timeout", type=float, default=5.0, help="verdict timeout before latency is learned")
+    parser.add_argument("--max-p95-ms", type=float, help="exit 1 if p95 trigger-to-verdict exceeds this")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    parser.add_argument("--verbose", action="store_true", help="keep the station's console output")
+    parser.add_argument("--transport", default="tcp",
+                        help="camera client for --engine update: tcp or module:attribute (see asms.plugins)")
+    parser.add_argument("--event-log", default="jsonl",
+                        help="event log for --engine update: jsonl, binary, off or module:attribute")
+    add_simulator_args(parser)
+    args = parser.parse_args(argv)
+    if args.cameras > 1 and args.engine != "station":
+        parser.error("--cameras needs --engine station")
+    if (args.transport, args.event_log) != ("tcp", "jsonl") and args.engine != "update":
+        parser.error("--transport and --event-log need --engine update")
+
+    summary = asyncio.run(run_benchmark(args))
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_summary(summary)
+
+    if args.max_p95_ms is not None and summary["p95_ms"] is not None and summary["p95_ms"] > args.max_p95_ms:
+        print(f"[Bench] FAIL: p95 {summary['p95_ms']} ms > budget {args.max_p95_ms} ms")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,530 @@
+import asyncio
+import random
+import socket
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+# ------------------------
+# Protocol Framing
+# ------------------------
+STX = 0x02
+ETX = 0x03
+FRAME_END = (ETX, 0x0A, 0x0D)  # ETX, or a bare CR/LF from unframed replies
+
+
+def build_command(job_number: int) -> bytes:
+    return b'\x02' + f"set job {job_number}".encode('ascii') + b'\x03'
+
+
+def build_trigger_command() -> bytes:
+    return b'\x02trigger\x03'
+
+
+class FrameBuffer:
+    """Reassembles STX/ETX frames from a TCP byte stream.
+
+    A frame may arrive split over several reads, or several frames may arrive
+    in one read; feed() returns every frame completed by the new data.
+    """
+
+    def __init__(self, max_size=64 * 1024):
+        self._buf = bytearray()
+        self.max_size = max_size
+
+    def feed(self, data: bytes) -> list:
+        self._buf += data
+        frames = []
+        start = 0
+        for i, byte in enumerate(self._buf):
+            if byte in FRAME_END:
+                payload = bytes(self._buf[start:i])
+                stx = payload.rfind(b'\x02')
+                if stx != -1:
+                    payload = payload[stx + 1:]
+                payload = payload.strip()
+                if payload:
+                    frames.append(payload)
+                start = i + 1
+        del self._buf[:start]
+        if len(self._buf) > self.max_size:
+            # Garbage with no terminator; keep only the newest partial frame
+            stx = self._buf.rfind(b'\x02')
+            del self._buf[:stx if stx != -1 else len(self._buf)]
+        return frames
+
+    def clear(self):
+        self._buf.clear()
+
+
+def decode_frame(frame: bytes) -> str:
+    return frame.decode(errors='ignore').strip().lower()
+
+
+# ------------------------
+# Camera Client
+# ------------------------
+class CameraCommand:
+    """One command in flight: its ack (None when the camera doesn't send one) and, for triggers, its verdict."""
+
+    def __init__(self, payload: bytes, expect_result: bool, expect_ack=True):
+        self.payload = payload
+        self.ack = Future() if expect_ack else None
+        self.result = Future() if expect_result else None
+        self.sent_at = None
+
+    def wait_ack(self, timeout=None):
+        return _wait(self.ack, timeout)
+
+    def wait_result(self, timeout=None):
+        return _wait(self.result, timeout)
+
+
+def _wait(future, timeout):
+    try:
+        return future.result(timeout)
+    except FutureTimeout:
+        return None
+
+
+class _Pending:
+    """A future waiting on a link for its frame, or the tombstone of a cancelled one."""
+
+    __slots__ = ("future", "sent_at", "expires")
+
+    def __init__(self, future, sent_at):
+        self.future = future
+        self.sent_at = sent_at
+        self.expires = None  # set when cancelled: how long its late frame is still expected
+
+
+def _bury(link, future, late_window):
+    # Leave a tombstone in the cancelled future's place, so its late frame is
+    # swallowed instead of being matched to the command behind it
+    for pending in link.waiting:
+        if pending.future is future:
+            pending.expires = time.monotonic() + late_window
+            future.cancel()
+            return
+
+
+def _match(link, now):
+    """Pops the entry the frame arriving now answers; None when nothing waits.
+
+    A frame reaching a tombstone is its late answer unless the tombstone has
+    expired, or the live command behind it has been in flight longer than the
+    fastest answer seen on this link — then the cancelled frame was lost and
+    the tombstone is dropped. Either way the camera answers in order.
+    """
+    while link.waiting:
+        head = link.waiting.popleft()
+        if head.expires is None:
+            if link.fastest is None or now - head.sent_at < link.fastest:
+                link.fastest = now - head.sent_at
+            return head
+        if now < head.expires:
+            live = next((p for p in link.waiting if p.expires is None), None)
+            if live is None or link.fastest is not None and now - live.sent_at < link.fastest:
+                return head
+    return None
+
+
+class _Link:
+    """One TCP connection to the camera, reconnected with backoff."""
+
+    def __init__(self, client, name, port):
+        self.client = client
+        self.name = name
+        self.port = port
+        self.sock = None
+        self.connected = threading.Event()
+        self.waiting = deque()  # _Pending futures answered, in order, by frames on this link
+        self.fastest = None  # quickest answer seen, in seconds
+        self.reconnects = 0
+        self.last_error = None
+        self.up_since = None
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name=f"camera-{self.name}", daemon=True)
+        self.thread.start()
+
+    def _connect(self):
+        client = self.client
+        sock = socket.create_connection((client.host, self.port), timeout=client.connect_timeout)
+        sock.settimeout(None)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        # Notice a dead camera within a few seconds rather than hours
+        for opt, value in (("TCP_KEEPIDLE", 2), ("TCP_KEEPINTVL", 1), ("TCP_KEEPCNT", 3)):
+            if hasattr(socket, opt):
+                sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, opt), value)
+        return sock
+
+    def _run(self):
+        client = self.client
+        delay = client.backoff_initial
+        while not client.closed:
+            try:
+                self.sock = self._connect()
+            except OSError as e:
+                self.last_error = str(e)
+                time.sleep(delay * (1 + random.random() * 0.25))
+                delay = min(delay * 2, client.backoff_max)
+                continue
+
+            if self.reconnects:
+                print(f"[Camera] {self.name} channel reconnected to {client.host}:{self.port}")
+            else:
+                print(f"[Startup] Connected to {self.name} port {self.port}")
+            delay = client.backoff_initial
+            self.up_since = time.monotonic()
+            self.connected.set()
+
+            try:
+                self._read()
+            except OSError as e:
+                self.last_error = str(e)
+
+            self.connected.clear()
+            self.up_since = None
+            self._fail_waiting()
+            if client.closed:
+                return
+            self.reconnects += 1
+            print(f"[Camera] {self.name} channel lost ({self.last_error}) — reconnecting...")
+
+    def _read(self):
+        frames = FrameBuffer()
+        while True:
+            data = self.sock.recv(self.client.recv_size)
+            if not data:
+                self.last_error = "closed by camera"
+                return
+            for frame in frames.feed(data):
+                self.client._dispatch(self, decode_frame(frame))
+
+    def _fail_waiting(self):
+        with self.client._lock:
+            waiting = list(self.waiting)
+            self.waiting.clear()
+        for pending in waiting:
+            if not pending.future.done():
+                pending.future.set_exception(ConnectionError(f"camera {self.name} channel lost"))
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+
+
+class CameraClient:
+    """Persistent client owning the camera's command and result channels.
+
+    Commands are pipelined: each send() returns at once with a CameraCommand
+    whose ack (and verdict, for triggers) is matched in order as frames
+    arrive. Acks are matched strictly in order, so trigger_ack must say
+    whether the camera acks 'trigger' as well as 'set job': with it off no
+    ack is expected for a trigger, only its verdict. Dropped channels are
+    reconnected in the background with exponential backoff; health()
+    reports their state. A cancelled command leaves a tombstone that
+    swallows its late frame for up to late_window seconds.
+    """
+
+    def __init__(self, host, command_port=2300, result_port=2300, connect_timeout=2.0,
+                 backoff_initial=0.05, backoff_max=2.0, recv_size=1024, trigger_ack=False, late_window=5.0):
+        self.host = host
+        self.trigger_ack = trigger_ack
+        self.late_window = late_window
+        self.connect_timeout = connect_timeout
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.recv_size = recv_size
+        self.closed = False
+        self.unmatched = 0
+        self.late = 0
+        self._lock = threading.Lock()
+        self._command = _Link(self, "command", command_port)
+        self._result = _Link(self, "result", result_port)
+
+    def start(self, timeout=None):
+        self._command.start()
+        self._result.start()
+        return self.wait_connected(timeout)
+
+    def wait_connected(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for link in (self._command, self._result):
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not link.connected.wait(remaining):
+                return False
+        return True
+
+    @property
+    def connected(self):
+        return self._command.connected.is_set() and self._result.connected.is_set()
+
+    def send(self, payload: bytes, expect_result=False) -> CameraCommand:
+        if not self.connected:
+            raise ConnectionError(f"camera {self.host} not connected")
+        cmd = CameraCommand(payload, expect_result, expect_ack=self.trigger_ack or not expect_result)
+        with self._lock:
+            cmd.sent_at = time.monotonic()
+            if cmd.ack is not None:
+                self._command.waiting.append(_Pending(cmd.ack, cmd.sent_at))
+            if expect_result:
+                self._result.waiting.append(_Pending(cmd.result, cmd.sent_at))
+            try:
+                self._command.sock.sendall(payload)
+            except (OSError, AttributeError) as e:
+                self._forget(cmd)
+                raise ConnectionError(f"camera {self.host} send failed: {e}") from e
+        return cmd
+
+    def request(self, payload: bytes, timeout=None):
+        cmd = self.send(payload)
+        ack = cmd.wait_ack(timeout)
+        if ack is None:
+            self.cancel(cmd)
+        return ack
+
+    def cancel(self, cmd: CameraCommand):
+        # Give up on a command whose ack or verdict never came; a late frame
+        # for it lands on its tombstone, not on the next command
+        with self._lock:
+            for link, future in ((self._command, cmd.ack), (self._result, cmd.result)):
+                if future is not None and not future.done():
+                    _bury(link, future, self.late_window)
+
+    def _forget(self, cmd):
+        # The command never went out: nothing will answer it
+        for link, future in ((self._command, cmd.ack), (self._result, cmd.result)):
+            if future is not None:
+                link.waiting = deque(p for p in link.waiting if p.future is not future)
+                future.cancel()
+
+    def _dispatch(self, link, message):
+        with self._lock:
+            pending = _match(link, time.monotonic())
+            if pending is not None and pending.expires is not None:
+                self.late += 1
+                return
+        if pending is None or not pending.future.set_running_or_notify_cancel():
+            self.unmatched += 1
+            return
+        pending.future.set_result(message)
+
+    def health(self) -> dict:
+        now = time.monotonic()
+        return {
+            "host": self.host,
+            "connected": self.connected,
+            "unmatched_frames": self.unmatched,
+            "late_frames": self.late,
+            **{
+                link.name: {
+                    "port": link.port,
+                    "connected": link.connected.is_set(),
+                    "uptime_s": round(now - link.up_since, 3) if link.up_since else 0.0,
+                    "reconnects": link.reconnects,
+                    "in_flight": sum(p.expires is None for p in link.waiting),
+                    "last_error": link.last_error,
+                }
+                for link in (self._command, self._result)
+            },
+        }
+
+    def close(self):
+        self.closed = True
+        for link in (self._command, self._result):
+            if link.sock:
+                try:
+                    link.sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+
+# ------------------------
+# Asyncio Camera Client
+# ------------------------
+class AsyncCameraCommand:
+    def __init__(self, payload: bytes, expect_result: bool, loop, expect_ack=True):
+        self.payload = payload
+        self.ack = loop.create_future() if expect_ack else None
+        self.result = loop.create_future() if expect_result else None
+        self.sent_at = None
+
+    async def wait_ack(self, timeout=None):
+        return await _await(self.ack, timeout)
+
+    async def wait_result(self, timeout=None):
+        return await _await(self.result, timeout)
+
+
+async def _await(future, timeout):
+    try:
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+    except asyncio.TimeoutError:
+        return None
+
+
+class _AsyncLink:
+    def __init__(self, name, port):
+        self.name = name
+        self.port = port
+        self.writer = None
+        self.connected = asyncio.Event()
+        self.waiting = deque()  # _Pending futures, as in _Link
+        self.fastest = None
+        self.reconnects = 0
+        self.last_error = None
+        self.up_since = None
+        self.task = None
+
+
+class AsyncCameraClient:
+    """CameraClient for an asyncio event loop; one task per channel, no threads."""
+
+    def __init__(self, host, command_port=2300, result_port=2300, connect_timeout=2.0,
+                 backoff_initial=0.05, backoff_max=2.0, recv_size=1024, label=None, trigger_ack=False,
+                 late_window=5.0):
+        self.host = host
+        self.trigger_ack = trigger_ack
+        self.late_window = late_window
+        self.connect_timeout = connect_timeout
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.recv_size = recv_size
+        self.label = label or host
+        self.closed = False
+        self.unmatched = 0
+        self.late = 0
+        self._command = _AsyncLink("command", command_port)
+        self._result = _AsyncLink("result", result_port)
+
+    async def start(self, timeout=None):
+        for link in (self._command, self._result):
+            link.task = asyncio.create_task(self._run(link), name=f"{self.label}-{link.name}")
+        return await self.wait_connected(timeout)
+
+    async def wait_connected(self, timeout=None):
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(self._command.connected.wait(), self._result.connected.wait()), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    @property
+    def connected(self):
+        return self._command.connected.is_set() and self._result.connected.is_set()
+
+    async def _run(self, link):
+        delay = self.backoff_initial
+        while not self.closed:
+            try:
+                reader, link.writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, link.port), self.connect_timeout)
+            except (OSError, asyncio.TimeoutError) as e:
+                link.last_error = str(e) or type(e).__name__
+                await asyncio.sleep(delay * (1 + random.random() * 0.25))
+                delay = min(delay * 2, self.backoff_max)
+                continue
+
+            sock = link.writer.get_extra_info("socket")
+            if sock is not None:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            if link.reconnects:
+                print(f"[{self.label}] {link.name} channel reconnected to {self.host}:{link.port}")
+            else:
+                print(f"[{self.label}] Connected to {link.name} port {link.port}")
+            delay = self.backoff_initial
+            link.up_since = time.monotonic()
+            link.connected.set()
+
+            frames = FrameBuffer()
+            try:
+                while True:
+                    data = await reader.read(self.recv_size)
+                    if not data:
+                        link.last_error = "closed by camera"
+                        break
+                    for frame in frames.feed(data):
+                        self._dispatch(link, decode_frame(frame))
+            except OSError as e:
+                link.last_error = str(e)
+
+            link.connected.clear()
+            link.up_since = None
+            link.writer.close()
+            link.writer = None
+            while link.waiting:
+                future = link.waiting.popleft().future
+                if not future.done():
+                    future.set_exception(ConnectionError(f"camera {link.name} channel lost"))
+            if self.closed:
+                return
+            link.reconnects += 1
+            print(f"[{self.label}] {link.name} channel lost ({link.last_error}) — reconnecting...")
+
+    def _dispatch(self, link, message):
+        pending = _match(link, time.monotonic())
+        if pending is not None and pending.expires is not None:
+            self.late += 1
+        elif pending is None or pending.future.done():
+            self.unmatched += 1
+        else:
+            pending.future.set_result(message)
+
+    def send(self, payload: bytes, expect_result=False) -> AsyncCameraCommand:
+        if not self.connected:
+            raise ConnectionError(f"camera {self.host} not connected")
+        cmd = AsyncCameraCommand(payload, expect_result, asyncio.get_running_loop(),
+                                 expect_ack=self.trigger_ack or not expect_result)
+        cmd.sent_at = time.monotonic()
+        if cmd.ack is not None:
+            self._command.waiting.append(_Pending(cmd.ack, cmd.sent_at))
+        if expect_result:
+            self._result.waiting.append(_Pending(cmd.result, cmd.sent_at))
+        self._command.writer.write(payload)
+        return cmd
+
+    async def request(self, payload: bytes, timeout=None):
+        cmd = self.send(payload)
+        ack = await cmd.wait_ack(timeout)
+        if ack is None:
+            self.cancel(cmd)
+        return ack
+
+    def cancel(self, cmd):
+        for link, future in ((self._command, cmd.ack), (self._result, cmd.result)):
+            if future is not None and not future.done():
+                _bury(link, future, self.late_window)
+
+    def health(self) -> dict:
+        now = time.monotonic()
+        return {
+            "host": self.host,
+            "connected": self.connected,
+            "unmatched_frames": self.unmatched,
+            "late_frames": self.late,
+            **{
+                link.name: {
+                    "port": link.port,
+                    "connected": link.connected.is_set(),
+                    "uptime_s": round(now - link.up_since, 3) if link.up_since else 0.0,
+                    "reconnects": link.reconnects,
+                    "in_flight": sum(p.expires is None for p in link.waiting),
+                    "last_error": link.last_error,
+                }
+                for link in (self._command, self._result)
+            },
+        }
+
+    async def close(self):
+        self.closed = True
+        for link in (self._command, self._result):
+            if link.task:
+                link.task.cancel()
+            if link.writer:
+                link.writer.close()
@@ -0,0 +1,181 @@
+import argparse
+import asyncio
+import random
+
+from asms.camera import FrameBuffer, decode_frame
+
+# ------------------------
+# Camera Simulator
+# ------------------------
+DELIVERY_MODES = ("whole", "fragmented", "coalesced")
+
+
+class CameraSimulator:
+    """Local TCP stand-in for the camera's port 2300 protocol.
+
+    Every framed command is acked on its own connection after ack_latency,
+    except triggers when trigger_ack is off.
+    A trigger produces a 'true'/'false' verdict after inspection_latency
+    (+/- jitter), sent to the connections that never sent a command (the
+    station's result channel), or back on the command connection if there
+    are none. Verdicts can be split into single-byte writes ("fragmented")
+    or held for coalesce_window and written together ("coalesced").
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, ack_latency=0.002, inspection_latency=0.03,
+                 jitter=0.005, pass_ratio=1.0, drop_ratio=0.0, delivery="whole",
+                 coalesce_window=0.01, ack=b"OK", trigger_ack=True, seed=None, verbose=False):
+        if delivery not in DELIVERY_MODES:
+            raise ValueError(f"Unknown delivery mode: {delivery}")
+        self.host = host
+        self.port = port
+        self.ack_latency = ack_latency
+        self.inspection_latency = inspection_latency
+        self.jitter = jitter
+        self.pass_ratio = pass_ratio
+        self.drop_ratio = drop_ratio
+        self.delivery = delivery
+        self.coalesce_window = coalesce_window
+        self.ack = ack
+        self.trigger_ack = trigger_ack
+        self.verbose = verbose
+        self.random = random.Random(seed)
+        self.job = None
+        self.stats = {"commands": 0, "job_switches": 0, "triggers": 0, "passed": 0, "failed": 0, "dropped": 0}
+        self._server = None
+        self._listeners = set()
+        self._commanders = set()
+        self._held = []
+        self._flush_task = None
+        self._handlers = set()
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        if self._server:
+            self._server.close()
+            for writer in self._listeners | self._commanders:
+                writer.close()
+            # Let each handler see EOF and exit instead of being cancelled at shutdown
+            await asyncio.gather(*self._handlers, return_exceptions=True)
+            await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        self._handlers.add(asyncio.current_task())
+        self._listeners.add(writer)
+        frames = FrameBuffer()
+        try:
+            while True:
+                data = await reader.read(1024)
+                if not data:
+                    return
+                for frame in frames.feed(data):
+                    self._listeners.discard(writer)
+                    self._commanders.add(writer)
+                    asyncio.ensure_future(self._command(writer, decode_frame(frame)))
+        except OSError:
+            return
+        finally:
+            self._listeners.discard(writer)
+            self._commanders.discard(writer)
+            self._handlers.discard(asyncio.current_task())
+            writer.close()
+
+    async def _command(self, writer, command):
+        self.stats["commands"] += 1
+        if self.verbose:
+            print(f"[Sim] <- {command}")
+        if command.startswith("set job"):
+            self.stats["job_switches"] += 1
+        elif command == "trigger":
+            # The exposure starts on receipt; the ack does not delay it
+            self.stats["triggers"] += 1
+            asyncio.ensure_future(self._inspect(writer))
+            if not self.trigger_ack:
+                return
+        await asyncio.sleep(self.ack_latency)
+        if command.startswith("set job"):
+            self.job = command[len("set job"):].strip()
+        if not writer.is_closing():
+            writer.write(b"\x02" + self.ack + b"\x03")
+
+    async def _inspect(self, commander):
+        delay = self.inspection_latency + self.random.uniform(-self.jitter, self.jitter)
+        await asyncio.sleep(max(0.0, delay))
+        if self.random.random() < self.drop_ratio:
+            self.stats["dropped"] += 1
+            return
+        passed = self.random.random() < self.pass_ratio
+        self.stats["passed" if passed else "failed"] += 1
+        frame = b"\x02" + (b"true" if passed else b"false") + b"\x03"
+        targets = [w for w in self._listeners if not w.is_closing()] or [commander]
+
+        if self.delivery == "coalesced":
+            self._held.append((frame, targets))
+            if self._flush_task is None or self._flush_task.done():
+                self._flush_task = asyncio.ensure_future(self._flush_held())
+        elif self.delivery == "fragmented":
+            for i in range(len(frame)):
+                for writer in targets:
+                    writer.write(frame[i:i + 1])
+                    await writer.drain()
+                await asyncio.sleep(0.0005)
+        else:
+            for writer in targets:
+                writer.write(frame)
+
+    async def _flush_held(self):
+        await asyncio.sleep(self.coalesce_window)
+        held, self._held = self._held, []
+        batches = {}
+        for frame, targets in held:
+            for writer in targets:
+                batches.setdefault(writer, []).append(frame)
+        for writer, frames in batches.items():
+            if not writer.is_closing():
+                writer.write(b"".join(frames))
+
+
+def add_simulator_args(parser):
+    parser.add_argument("--ack-latency", type=float, default=0.002, help="seconds before each ack")
+    parser.add_argument("--inspection-latency", type=float, default=0.03, help="seconds from trigger to verdict")
+    parser.add_argument("--jitter", type=float, default=0.005, help="+/- seconds on the inspection latency")
+    parser.add_argument("--pass-ratio", type=float, default=1.0, help="fraction of inspections that pass")
+    parser.add_argument("--drop-ratio", type=float, default=0.0, help="fraction of verdicts never sent")
+    parser.add_argument("--delivery", choices=DELIVERY_MODES, default="whole")
+    parser.add_argument("--no-trigger-ack", dest="trigger_ack", action="store_false",
+                        help="answer 'trigger' with its verdict only, no ack")
+    parser.add_argument("--seed", type=int, help="random seed for repeatable runs")
+
+
+def simulator_from_args(args, **kwargs):
+    return CameraSimulator(
+        ack_latency=args.ack_latency, inspection_latency=args.inspection_latency, jitter=args.jitter,
+        pass_ratio=args.pass_ratio, drop_ratio=args.drop_ratio, delivery=args.delivery,
+        trigger_ack=args.trigger_ack, seed=args.seed,
+        **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local camera simulator speaking the set job/trigger protocol")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2300)
+    parser.add_argument("--verbose", action="store_true", help="print every command received")
+    add_simulator_args(parser)
+    args = parser.parse_args()
+
+    async def serve():
+        sim = await simulator_from_args(args, host=args.host, port=args.port, verbose=args.verbose).start()
+        print(f"[Sim] Camera simulator listening on {args.host}:{sim.port}")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        print("\n[Sim] Stopped")
+
+if __name__ == "__main__":
+    main()
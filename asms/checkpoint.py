@@ -0,0 +1,77 @@
+import json
+import os
+import threading
+import time
+
+# ------------------------
+# Cycle Checkpoint
+# ------------------------
+class Checkpoint:
+    """Latest cycle progress, kept in a small JSON file that is always whole.
+
+    update() only merges fields into a dict and wakes the writer thread,
+    which writes the newest state to a temp file, fsyncs it and renames it
+    over the checkpoint. Several updates in quick succession become one
+    write, and a crash at any point leaves either the old or the new file.
+    """
+
+    def __init__(self, path="station.checkpoint.json"):
+        self.path = path
+        self.state = {}
+        self.writes = 0
+        self._version = 0
+        self._written = 0
+        self._lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._stop = False
+        self._thread = None
+
+    def load(self, max_age=None):
+        """Returns the saved state, or None if missing, unreadable or older than max_age seconds."""
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if max_age is not None and time.time() - state.get("saved_at", 0) > max_age:
+            return None
+        return state
+
+    def update(self, **fields):
+        with self._lock:
+            self.state.update(fields)
+            self._version += 1
+        self._dirty.set()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="checkpoint", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._stop = True
+        self._dirty.set()
+        if self._thread:
+            self._thread.join()
+        self._write()
+
+    def _run(self):
+        while not self._stop:
+            self._dirty.wait()
+            self._dirty.clear()
+            self._write()
+
+    def _write(self):
+        with self._lock:
+            if self._version == self._written:
+                return
+            version = self._version
+            data = json.dumps(dict(self.state, saved_at=time.time()))
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._written = version
+        self.writes += 1
@@ -0,0 +1,109 @@
+import argparse
+import signal
+import sys
+
+# ------------------------
+# Subcommands
+# ------------------------
+# Each handler imports what it needs, so probing sensors doesn't load the
+# camera stack and `stats` doesn't load gpiozero.
+def cmd_run(argv):
+    """Run the single-station loop, or several stations from a JSON file with --stations."""
+    if "--stations" in argv:
+        from asms import station
+
+        i = argv.index("--stations")
+        if i + 1 >= len(argv):
+            sys.exit("asms run: --stations needs a JSON file")
+        station.main([argv[i + 1], *argv[:i], *argv[i + 2:]], prog="asms run --stations")
+    else:
+        from asms import core
+
+        core.main(argv, prog="asms run")
+
+
+def cmd_probe_sensors(argv):
+    """Print sensor edges and pairs to check the wiring, without a camera."""
+    from asms import coincidence, plugins
+
+    parser = argparse.ArgumentParser(prog="asms probe-sensors", description=cmd_probe_sensors.__doc__)
+    parser.add_argument("--pins", type=int, nargs="+", default=[17, 27], help="GPIO pins (BCM numbering)")
+    parser.add_argument("--pull-up", action="store_true", help="sensor pulls the pin LOW when active")
+    parser.add_argument("--bounce-time", type=float, help="debounce in seconds")
+    parser.add_argument("--released", action="store_true", help="also print releases")
+    parser.add_argument("--pair-window", type=float, default=0.5,
+                        help="with two pins, report edges within this many seconds as one part")
+    parser.add_argument("--trigger", default="gpio", help="sensor input: gpio, stdin or module:attribute")
+    args = parser.parse_args(argv)
+
+    def on_pair(t1_ns, t2_ns):
+        print(f"[✅] Both sensors within {abs(t2_ns - t1_ns) / 1e6:.1f} ms — one part")
+        detector.arm()
+
+    detector = coincidence.CoincidenceDetector(args.pair_window, on_pair) if len(args.pins) == 2 else None
+
+    def pressed(sensor, pin):
+        def handler():
+            print(f"[\U0001F514] Sensor {sensor} (GPIO{pin}) pulse detected")
+            if detector:
+                detector.edge(sensor)
+        return handler
+
+    def released(sensor, pin):
+        return lambda: print(f"[·] Sensor {sensor} (GPIO{pin}) released")
+
+    sensors = list(enumerate(args.pins, 1))
+    source = plugins.resolve("trigger", args.trigger)
+    options = {"bounce_time": args.bounce_time}
+    if args.pull_up:
+        options["pull_up"] = True
+    triggers = source(args.pins, **options).start(
+        [pressed(sensor, pin) for sensor, pin in sensors],
+        [released(sensor, pin) for sensor, pin in sensors] if args.released else None)
+    print(f"[Ready] Waiting for sensor pulses on {', '.join(f'GPIO{pin}' for pin in args.pins)}...")
+    try:
+        signal.pause()
+    except KeyboardInterrupt:
+        print("\n[System] Exiting gracefully by Ctrl+C")
+    finally:
+        triggers.close()
+        if detector:
+            stats = detector.snapshot()
+            print(f"[System] {stats['edges']} edges, {stats['paired']} pairs, {stats['unpaired']} unpaired")
+
+
+def cmd_bench(argv):
+    """End-to-end benchmark against the camera simulator (see asms.bench)."""
+    from asms import bench
+
+    bench.main(argv, prog="asms bench")
+
+
+def cmd_stats(argv):
+    """Rolling per-stage latency percentiles from a running station."""
+    from asms import stage_metrics
+
+    stage_metrics.main(["stats", *argv], prog="asms")
+
+
+COMMANDS = {
+    "run": cmd_run,
+    "probe-sensors": cmd_probe_sensors,
+    "bench": cmd_bench,
+    "stats": cmd_stats,
+}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    commands = "\n".join(f"  {name:<15}{handler.__doc__}" for name, handler in COMMANDS.items())
+    parser = argparse.ArgumentParser(
+        prog="asms", usage="asms [-h] <command> [options]", description="Assembly station monitoring",
+        epilog=f"commands:\n{commands}\n\nRun 'asms <command> --help' for a command's options.",
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=COMMANDS, metavar="<command>")
+    args = parser.parse_args(argv[:1])
+    COMMANDS[args.command](argv[1:])
+
+if __name__ == "__main__":
+    main()
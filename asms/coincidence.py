@@ -0,0 +1,74 @@
+import threading
+import time
+
+# edge() outcomes
+REJECTED = 0  # detector disarmed: a part is already being inspected
+PENDING = 1  # waiting for the other sensor
+PAIRED = 2  # both sensors within the window; on_pair has run
+
+# ------------------------
+# Dual-Sensor Coincidence Detector
+# ------------------------
+class CoincidenceDetector:
+    """Pairs the edges of two sensors and acts on the pair in the edge callback.
+
+    edge() is called on gpiozero's callback thread with the edge time taken
+    first thing in the callback. Under one lock it either keeps the edge or,
+    when the other sensor fired within `window` seconds, disarms itself and
+    then calls on_pair(t1_ns, t2_ns) on the same thread, so the trigger
+    can be on the wire before the main loop wakes up. Edges that arrive
+    while disarmed are rejected; an edge whose partner doesn't come within
+    the window, or that is superseded by a repeat of its own sensor, is
+    counted as unpaired. arm() readies the detector for the next part.
+    """
+
+    def __init__(self, window=0.5, on_pair=None):
+        self.window_ns = int(window * 1e9) if window else None  # None pairs edges however far apart
+        self.on_pair = on_pair
+        self.armed = True
+        self.edges = [0, 0]  # pending perf_counter_ns() edge per sensor, 0 for none
+        self.last_spread_ns = None
+        self.stats = {"edges": 0, "paired": 0, "rejected": 0, "unpaired": 0}
+        self._lock = threading.Lock()
+
+    def edge(self, sensor, t_ns=None):
+        t_ns = t_ns or time.perf_counter_ns()
+        mine, other = sensor - 1, 2 - sensor
+        with self._lock:
+            self.stats["edges"] += 1
+            if not self.armed:
+                self.stats["rejected"] += 1
+                return REJECTED
+            if self.edges[mine]:
+                self.stats["unpaired"] += 1
+            if self.edges[other] and self.window_ns is not None and t_ns - self.edges[other] > self.window_ns:
+                self.stats["unpaired"] += 1
+                self.edges[other] = 0
+            self.edges[mine] = t_ns
+            if not self.edges[other]:
+                return PENDING
+            t1, t2 = self.edges
+            self.edges = [0, 0]
+            self.armed = False
+            self.last_spread_ns = abs(t2 - t1)
+            self.stats["paired"] += 1
+        if self.on_pair:
+            self.on_pair(t1, t2)
+        return PAIRED
+
+    def arm(self):
+        with self._lock:
+            self.edges = [0, 0]
+            self.armed = True
+
+    def disarm(self):
+        with self._lock:
+            self.edges = [0, 0]
+            self.armed = False
+
+    def snapshot(self):
+        with self._lock:
+            spread = self.last_spread_ns
+            return dict(self.stats, armed=self.armed,
+                        window_ms=self.window_ns / 1e6 if self.window_ns is not None else None,
+                        last_spread_ms=round(spread / 1e6, 3) if spread is not None else None)
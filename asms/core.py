@@ -0,0 +1,382 @@
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import logging
+
+from asms import coincidence, eventlog, historydb, jobs, kpi, plugins, profiling, stage_metrics
+from asms.checkpoint import Checkpoint
+from asms.recipes import load_recipe
+from asms.retry_scheduler import RetryScheduler
+from asms.trigger_trace import TraceRecorder
+
+# ------------------------
+# Logging Setup
+# ------------------------
+# The job log file is attached in main(), so importing the core writes nothing
+logger = logging.getLogger("asms")
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+# Per-stage events from the trigger/job hot path go through a queue to a
+# background writer instead of the synchronous file logger above; built
+# from EVENT_LOG in main() unless already set
+events = None
+stages = stage_metrics.StageTimer()
+# Sessions, jobs, cycles, attempts and stage timings, inserted in batches off the hot path
+history = None
+# Live shift KPIs for the dashboard, updated in memory as jobs and cycles finish
+kpis = kpi.KpiAggregator()
+
+# ------------------------
+# Configuration
+# ------------------------
+CAMERA_IP = '192.168.0.1'
+COMMAND_PORT = 2300
+RESULT_PORT = 2300
+TRIGGER1_PIN = 17  # GPIO17
+TRIGGER2_PIN = 27  # GPIO27
+PRELOAD_NEXT_JOB = True  # switch to job N+1 as soon as job N passes
+FIRE_FROM_CALLBACK = True  # send the trigger from the GPIO callback when the job is already loaded
+PAIR_WINDOW = 0.5  # seconds both sensors must fire within to count as one part; None for no limit
+BOUNCE_TIME = 0.1  # gpiozero debounce on the sensor pins (as in bothtrigger.py); None to disable
+ACK_TIMEOUT = 1.0  # seconds to wait for the camera to ack 'set job'
+TRIGGER_ACK = False  # the camera acks 'trigger' as well as 'set job'
+CONNECT_TIMEOUT = 5.0  # seconds to wait for the camera at startup
+RECIPE_FILE = "recipes.json"  # ordered job list, cycle length and verdict timeouts per product
+RECIPE = None  # recipe name in RECIPE_FILE; None for the file's active recipe
+MAX_ATTEMPTS = 10  # triggers per part before it is handed back to the operator
+CYCLE_RETRY_BUDGET = 20  # retries allowed across one cycle
+METRICS_PORT = 9108  # /metrics, /stats, /kpi and /dashboard endpoint; None to disable
+METRICS_HOST = "127.0.0.1"  # "0.0.0.0" to let supervisors open the dashboard from the LAN
+TRACE_FILE = None  # e.g. "triggers.trace" to record raw sensor edges for replay
+OPERATOR_ENV = "ASMS_OPERATOR"  # operator name when --operator is not given
+CHECKPOINT_FILE = "update.checkpoint.json"  # cycle progress for resuming after a crash; None to disable
+CHECKPOINT_MAX_AGE = 3600  # seconds; an older checkpoint starts a fresh cycle
+LOG_FILE = "job_pass_log.txt"  # job and cycle lines for log_analytics; None to disable
+EVENT_LOG = "jsonl"  # event log implementation: jsonl, binary, off or module:attribute (see asms.plugins)
+EVENT_LOG_FILE = "job_events.jsonl"
+HISTORY_DB = "history.db"  # SQLite production history; None to disable
+TRANSPORT = "tcp"  # camera client: tcp or module:attribute
+TRIGGER_SOURCE = "gpio"  # sensor input: gpio, stdin, manual or module:attribute
+STAGE_BUDGETS_MS = {}  # alarm limits, e.g. {"dual_to_trigger": 5, "inspection": 150, "cycle": 4000, "cycle_cpu": 50}
+PROFILE_INTERVAL = 0.01  # stack sampling period in profiling mode (toggle with SIGUSR1 or start with --profile)
+PROFILE_PREFIX = "profile"  # profiling output: <prefix>-<time>.folded and .cycles.json
+
+# ------------------------
+# State Variables
+# ------------------------
+camera = None
+detector = None
+profiler = None
+book = None  # jobs.JobBook: recipe position, cycle counters and the job records
+triggers = None
+fired_trigger = None  # (command, perf_counter_ns) sent from the GPIO callback, taken by run_job()
+metrics_server = None
+trace_recorder = None
+checkpoint = None
+recipe = None
+scheduler = None
+loaded_job = None
+trigger_received = threading.Event()
+operator_name = ""
+
+# ------------------------
+# Trigger Handlers
+# ------------------------
+def on_trigger1():
+    on_sensor(1, TRIGGER1_PIN, time.perf_counter_ns())
+
+def on_trigger2():
+    on_sensor(2, TRIGGER2_PIN, time.perf_counter_ns())
+
+def on_sensor(sensor, pin, t_ns):
+    # The detector is disarmed from the pair until the main loop re-arms it.
+    # No console output here: a blocked stdout would hold up the other
+    # sensor's callback; the main loop reports the pair and ignored edges
+    if detector.edge(sensor, t_ns) == coincidence.REJECTED:
+        events.emit(eventlog.SENSOR_IGNORED, sensor, pin)
+        return
+    events.emit(eventlog.SENSOR, sensor, pin)
+
+def on_pair(t1_ns, t2_ns):
+    # Runs on the callback thread of the second edge: the trigger goes out
+    # here when the job is already loaded, before the main loop wakes up
+    global fired_trigger
+    if FIRE_FROM_CALLBACK and PRELOAD_NEXT_JOB and loaded_job == book.current_job:
+        try:
+            fired_trigger = camera.send(recipe.trigger_frame, expect_result=True), time.perf_counter_ns()
+        except ConnectionError:
+            fired_trigger = None  # run_job() waits for the camera
+    stages.stamp(stage_metrics.TRIGGER1, t1_ns)
+    stages.stamp(stage_metrics.TRIGGER2, t2_ns)
+    stages.stamp(stage_metrics.DUAL, max(t1_ns, t2_ns))
+    events.emit(eventlog.DUAL_TRIGGER)
+    trigger_received.set()
+
+# ------------------------
+# Recipe
+# ------------------------
+def load_recipe_tables():
+    global recipe, scheduler
+
+    recipe = load_recipe(RECIPE_FILE, RECIPE)
+    scheduler = RetryScheduler(
+        recipe.result_timeout, timeouts=recipe.job_timeouts,
+        max_attempts=MAX_ATTEMPTS, cycle_retry_budget=CYCLE_RETRY_BUDGET)
+    print(f"[Startup] Recipe {recipe.describe()}")
+
+def open_book(saved=None):
+    # After load_recipe_tables() and once the writers exist; True if the checkpoint was resumed
+    global book
+
+    book = jobs.JobBook(recipe, scheduler, stages, events, history, kpis, logger, checkpoint=checkpoint,
+                        operator=operator_name, budgets=STAGE_BUDGETS_MS, profiler=profiler)
+    return book.resume(saved)
+
+# ------------------------
+# Job Switching
+# ------------------------
+def switch_job(step):
+    global loaded_job
+
+    job_number = recipe.jobs[step]
+    loaded_job = None
+    stages.stamp(stage_metrics.SWITCH_SENT)
+    events.emit(eventlog.JOB_SWITCH, job_number)
+    ack = camera.request(recipe.switch_frames[step], ACK_TIMEOUT)
+    print(f"[🔁] Job {job_number} switch command sent")
+
+    if ack is None:
+        print(f"[⚠️] No ack for job {job_number} switch within {ACK_TIMEOUT}s")
+        return False
+
+    stages.stamp(stage_metrics.ACK)
+    events.emit(eventlog.JOB_LOADED, job_number)
+    print(f"[🔁] Job {job_number} loaded")
+    loaded_job = job_number
+    return True
+
+# ------------------------
+# Job Execution with Retry and Time Logs
+# ------------------------
+def run_job(step, attempt=0):
+    global loaded_job, fired_trigger
+
+    job_number = recipe.jobs[step]
+    start_time = time.time()
+
+    while True:
+        attempt += 1
+        try:
+            if fired_trigger:
+                trigger, sent = fired_trigger
+                fired_trigger = None
+            else:
+                if not PRELOAD_NEXT_JOB:
+                    switch_job(step)
+                    time.sleep(0.2)
+                elif loaded_job != job_number and not switch_job(step):
+                    # An unanswered switch uses up an attempt like an unanswered trigger
+                    if not scheduler.allow_retry(job_number, attempt):
+                        return book.abandon(job_number, attempt, start_time)
+                    continue
+                trigger = camera.send(recipe.trigger_frame, expect_result=True)
+                sent = time.perf_counter_ns()
+
+            timeout = scheduler.timeout(job_number)
+            stages.stamp_trigger(sent)
+            book.trigger_sent(job_number, attempt)
+
+            result = trigger.wait_result(timeout)
+            latency = (time.perf_counter_ns() - sent) / 1e9
+            if result is None:
+                camera.cancel(trigger)
+            if book.verdict(job_number, attempt, result, latency, timeout) == jobs.PASSED:
+                book.passed(job_number, attempt, start_time)
+                return True
+
+            if not scheduler.allow_retry(job_number, attempt):
+                return book.abandon(job_number, attempt, start_time)
+            print(f"[🔁] Retrying job {job_number}...")
+        except ConnectionError as e:
+            events.emit(eventlog.CAMERA_LOST, job_number)
+            print(f"[⚠️] Camera connection lost during job {job_number}: {e} — waiting to reconnect...")
+            loaded_job = None
+            camera.wait_connected()
+        except Exception as e:
+            # Not inspected: the part stays on this job like an abandoned one
+            stages.reset()
+            print(f"[Error] During job {job_number}: {e}")
+            return False
+
+def health():
+    # Camera channels and the background writers, for /health and the exit summary
+    return {"camera": camera.health() if camera else None,
+            "event_log": events.health() if events else None,
+            "history": history.health() if history else None}
+
+def after_job(job_number, passed):
+    # Bookkeeping, then re-arm the sensors and preload the next job
+    book.finish(job_number, passed)
+    detector.arm()
+    # A repeated job stays loaded: switching it again could go out while
+    # a trigger fired from the callback is still being inspected
+    if passed and PRELOAD_NEXT_JOB and loaded_job != book.current_job:
+        try:
+            switch_job(book.step)
+        except ConnectionError as e:
+            print(f"[Error] Preloading job {book.current_job}: {e}")
+
+# ------------------------
+# Startup and Checkpoint
+# ------------------------
+def parse_args(argv=None, description="Dual-sensor triggered camera inspection station", prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description=description)
+    parser.add_argument("--operator", help=f"operator name (default: ${OPERATOR_ENV}, then the checkpoint, then a prompt)")
+    parser.add_argument("--fresh", action="store_true", help="ignore the checkpoint and start at the first job")
+    parser.add_argument("--profile", action="store_true", help="start in profiling mode (SIGUSR1 toggles it)")
+    parser.add_argument("--camera-ip", default=CAMERA_IP, help="camera address (default: %(default)s)")
+    parser.add_argument("--transport", default=TRANSPORT, help="camera client: tcp or module:attribute")
+    parser.add_argument("--event-log", default=EVENT_LOG, help="jsonl, binary, off or module:attribute")
+    parser.add_argument("--trigger", default=TRIGGER_SOURCE, help="sensor input: gpio, stdin, manual or module:attribute")
+    return parser.parse_args(argv)
+
+def connect_camera():
+    global camera
+
+    print(f"[Startup] Connecting to {CAMERA_IP}:{COMMAND_PORT} ...")
+    camera = plugins.resolve("transport", TRANSPORT)(CAMERA_IP, COMMAND_PORT, RESULT_PORT, trigger_ack=TRIGGER_ACK)
+    if not camera.start(CONNECT_TIMEOUT):
+        print("[Startup] Camera not reachable yet — retrying in the background")
+    elif PRELOAD_NEXT_JOB:
+        switch_job(book.step)
+
+def setup_triggers():
+    global triggers
+
+    source = plugins.resolve("trigger", TRIGGER_SOURCE)
+    triggers = source((TRIGGER1_PIN, TRIGGER2_PIN), bounce_time=BOUNCE_TIME).start((on_trigger1, on_trigger2))
+
+def setup_logging():
+    if LOG_FILE and not logger.handlers:
+        handler = logging.FileHandler(LOG_FILE, mode='a')
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+
+def _timed(fn):
+    start = time.perf_counter()
+    return fn(), time.perf_counter() - start
+
+# ------------------------
+# Main Execution
+# ------------------------
+def main(argv=None, description="Dual-sensor triggered camera inspection station", prog=None):
+    global camera, events, history, detector, profiler, metrics_server, trace_recorder, checkpoint, operator_name, CAMERA_IP, TRANSPORT, TRIGGER_SOURCE
+
+    args = parse_args(argv, description, prog)
+    CAMERA_IP, TRANSPORT, TRIGGER_SOURCE = args.camera_ip, args.transport, args.trigger
+    setup_logging()
+    try:
+        startup = time.perf_counter()
+        load_recipe_tables()
+        saved = None
+        if CHECKPOINT_FILE:
+            checkpoint = Checkpoint(CHECKPOINT_FILE)
+            saved = None if args.fresh else checkpoint.load(CHECKPOINT_MAX_AGE)
+
+        operator_name = (args.operator or os.environ.get(OPERATOR_ENV) or (saved or {}).get("operator") or "").strip()
+        if not operator_name:
+            operator_name = input("Enter operator name: ").strip()
+            startup = time.perf_counter()  # don't count the time spent typing
+        print(f"[System] Operator: {operator_name}")
+
+        if events is None:
+            events = plugins.resolve("event_log", args.event_log)(EVENT_LOG_FILE, {})
+        if history is None:
+            history = historydb.HistoryStore(HISTORY_DB) if HISTORY_DB else plugins.Null()
+        profiler = profiling.Profiler(PROFILE_PREFIX, PROFILE_INTERVAL)
+        resumed = open_book(saved)
+        book.start_session()
+
+        detector = coincidence.CoincidenceDetector(PAIR_WINDOW, on_pair)
+        profiler.install()
+        if args.profile:
+            profiler.start()
+        if METRICS_PORT:
+            metrics_server = stage_metrics.MetricsServer({"station": stages}, host=METRICS_HOST, port=METRICS_PORT)
+            kpi.add_kpi_routes(metrics_server, {"station": kpis})
+            metrics_server.add_route("/sensors", lambda: ("application/json", json.dumps(detector.snapshot())))
+            metrics_server.add_route("/health", lambda: ("application/json", json.dumps(health(), indent=2)))
+            metrics_server.start()
+
+        # The camera handshake and the GPIO pin setup don't depend on each other
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="startup") as pool:
+            connecting = pool.submit(_timed, connect_camera)
+            gpio = pool.submit(_timed, setup_triggers)
+            _, gpio_time = gpio.result()
+            _, camera_time = connecting.result()
+
+        if TRACE_FILE and getattr(triggers, "buttons", None):
+            trace_recorder = TraceRecorder(TRACE_FILE).start()
+            for button, pin in zip(triggers.buttons, (TRIGGER1_PIN, TRIGGER2_PIN)):
+                trace_recorder.wrap(button, pin)
+            print(f"[Startup] Recording sensor edges to {TRACE_FILE}")
+        elif TRACE_FILE:
+            print(f"[Startup] Trigger source {TRIGGER_SOURCE!r} has no pins to record")
+
+        print(f"[Startup] Ready in {time.perf_counter() - startup:.3f}s "
+              f"(camera {camera_time:.3f}s, GPIO {gpio_time:.3f}s in parallel)")
+        if resumed:
+            print(f"[Startup] Resuming cycle at job {book.current_job}: {book.cycle_jobs} of {recipe.cycle_length} "
+                  f"jobs done, {book.resume_attempt} attempts on this part")
+        if checkpoint:
+            checkpoint.start()
+            book.save_progress(book.resume_attempt)
+
+        print("\n[Ready] Waiting for BOTH GPIO triggers...")
+
+        while True:
+            trigger_received.wait()
+            trigger_received.clear()
+            print(f"[\U0001F514] Both sensors triggered ({detector.last_spread_ns / 1e6:.1f} ms apart) — proceeding to job")
+
+            job_number = book.current_job
+            ignored = detector.stats["rejected"]
+            passed = run_job(book.step, book.resume_attempt)
+            book.resume_attempt = 0
+            ignored = detector.stats["rejected"] - ignored
+            if ignored:
+                print(f"[⚠️] Ignored {ignored} sensor pulse(s) — job already in progress")
+            after_job(job_number, passed)
+
+    except KeyboardInterrupt:
+        print("\n[System] Exiting gracefully by Ctrl+C")
+    except Exception as e:
+        print(f"[Startup Error] {e}")
+    finally:
+        print(f"[System] Health: {json.dumps(health())}")
+        if camera:
+            camera.close()
+        if triggers:
+            triggers.close()
+        if trace_recorder:
+            trace_recorder.close()
+        if detector:
+            print(f"[System] Sensor edges: {detector.snapshot()}")
+        if profiler:
+            profiler.stop()
+        if metrics_server:
+            metrics_server.close()
+        if events:
+            events.close()
+        if history:
+            history.close()
+        if checkpoint:
+            checkpoint.close()
+        print("[System] Socket closed. Bye!")
+
+if __name__ == "__main__":
+    main()
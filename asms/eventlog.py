@@ -0,0 +1,198 @@
+import json
+import os
+import struct
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+# ------------------------
+# Event Codes
+# ------------------------
+# Hot-path code only calls EventLog.emit(code, a, b): a monotonic timestamp
+# and up to two ints go on a deque. Naming and formatting happen in the writer.
+SESSION = 1
+SENSOR = 2
+SENSOR_IGNORED = 3
+DUAL_TRIGGER = 4
+JOB_SWITCH = 5
+JOB_LOADED = 6
+TRIGGER_SENT = 7
+VERDICT_PASS = 8
+VERDICT_FAIL = 9
+VERDICT_UNKNOWN = 10
+NO_RESULT = 11
+JOB_DONE = 12
+CYCLE_DONE = 13
+CAMERA_LOST = 14
+LATENCY_DRIFT = 15
+RETRY_BUDGET = 16
+CAMERA_VERDICT = 17
+BUDGET_EXCEEDED = 18  # stage: index into profiling.BUDGET_STAGES; value_us clamped to ARG_MAX (~35.8 min)
+
+EVENTS = {
+    SESSION: ("session", ()),
+    SENSOR: ("sensor", ("sensor", "pin")),
+    SENSOR_IGNORED: ("sensor_ignored", ("sensor", "pin")),
+    DUAL_TRIGGER: ("dual_trigger", ()),
+    JOB_SWITCH: ("job_switch", ("job",)),
+    JOB_LOADED: ("job_loaded", ("job",)),
+    TRIGGER_SENT: ("trigger_sent", ("job", "attempt")),
+    VERDICT_PASS: ("verdict_pass", ("job", "attempt")),
+    VERDICT_FAIL: ("verdict_fail", ("job", "attempt")),
+    VERDICT_UNKNOWN: ("verdict_unknown", ("job", "attempt")),
+    NO_RESULT: ("no_result", ("job", "attempt")),
+    JOB_DONE: ("job_done", ("job", "retries")),
+    CYCLE_DONE: ("cycle_done", ("jobs",)),
+    CAMERA_LOST: ("camera_lost", ("job",)),
+    LATENCY_DRIFT: ("latency_drift", ("job", "ewma_us")),
+    RETRY_BUDGET: ("retry_budget", ("job", "attempts")),
+    CAMERA_VERDICT: ("camera_verdict", ("camera", "latency_us")),
+    BUDGET_EXCEEDED: ("budget_exceeded", ("stage", "value_us")),
+}
+
+# Binary records: wall-clock ns, monotonic ns, code, two int args
+BINARY_MAGIC = b"ASMSEV1\n"
+BINARY_RECORD = struct.Struct("<qqHii")
+NO_ARG = -1
+ARG_MAX = 2 ** 31 - 1  # largest int argument a binary record holds; clamp durations to it
+
+
+# ------------------------
+# Event Log
+# ------------------------
+class EventLog:
+    """Queue-backed event log written in batches by a background thread.
+
+    emit() never touches the disk: it appends a tuple to a bounded deque
+    (the oldest events are dropped and counted if the writer falls behind).
+    emit() may be called from any thread; the counters and the deque are
+    kept under one short lock.
+    The writer drains the deque every flush_interval, formats the batch as
+    JSONL or fixed-size binary records, and rotates the file at max_bytes.
+    """
+
+    def __init__(self, path="job_events.jsonl", fmt="jsonl", max_bytes=5 * 1024 * 1024,
+                 backups=3, flush_interval=0.25, max_pending=65536, context=None):
+        if fmt not in ("jsonl", "binary"):
+            raise ValueError(f"Unknown event log format: {fmt}")
+        self.path = path
+        self.fmt = fmt
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self.context = dict(context or {})  # added to every JSONL record, e.g. station/operator
+        self.emitted = 0
+        self.written = 0
+        self.dropped = 0
+        self._pending = deque(maxlen=max_pending)
+        self._lock = threading.Lock()
+        self._wall_anchor = time.time_ns()
+        self._mono_anchor = time.monotonic_ns()
+        self._file = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def emit(self, code, a=NO_ARG, b=NO_ARG):
+        event = (time.monotonic_ns(), code, a, b)
+        with self._lock:
+            if len(self._pending) == self._pending.maxlen:
+                self.dropped += 1  # append() pushes out the oldest
+            self._pending.append(event)
+            self.emitted += 1
+
+    def health(self):
+        return {"emitted": self.emitted, "written": self.written, "pending": len(self._pending),
+                "dropped": self.dropped}
+
+    def start(self):
+        self._open()
+        self._thread = threading.Thread(target=self._run, name="event-log", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self._flush()
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    # ------------------------
+    # Writer Thread
+    # ------------------------
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self._flush()
+
+    def _flush(self):
+        with self._lock:
+            batch = list(self._pending)
+            self._pending.clear()
+        if not batch:
+            return
+        data = self._encode(batch)
+        if self._file.tell() + len(data) > self.max_bytes and self._file.tell() > len(self._header()):
+            self._rotate()
+        self._file.write(data)
+        self._file.flush()
+        self.written += len(batch)
+
+    def _encode(self, batch):
+        offset = self._wall_anchor - self._mono_anchor
+        if self.fmt == "binary":
+            pack = BINARY_RECORD.pack
+            return b"".join(pack(mono + offset, mono, code, a, b) for mono, code, a, b in batch)
+
+        lines = []
+        for mono, code, a, b in batch:
+            name, fields = EVENTS.get(code, (f"event_{code}", ("a", "b")))
+            wall = mono + offset
+            record = {
+                "ts": datetime.fromtimestamp(wall / 1e9).isoformat(sep=" ", timespec="microseconds"),
+                "mono_ns": mono,
+                "event": name,
+                **self.context,
+            }
+            for key, value in zip(fields, (a, b)):
+                if value != NO_ARG:
+                    record[key] = value
+            lines.append(json.dumps(record, separators=(",", ":")))
+        return ("\n".join(lines) + "\n").encode()
+
+    def _header(self):
+        return BINARY_MAGIC if self.fmt == "binary" else b""
+
+    def _open(self):
+        self._file = open(self.path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(self._header())
+
+    def _rotate(self):
+        self._file.close()
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+
+
+def read_binary_events(path):
+    with open(path, "rb") as f:
+        if f.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+            raise ValueError(f"{path} is not a binary event log")
+        data = f.read()
+    usable = len(data) - len(data) % BINARY_RECORD.size
+    for wall, mono, code, a, b in BINARY_RECORD.iter_unpack(data[:usable]):
+        name, fields = EVENTS.get(code, (f"event_{code}", ("a", "b")))
+        record = {"wall_ns": wall, "mono_ns": mono, "event": name}
+        for key, value in zip(fields, (a, b)):
+            if value != NO_ARG:
+                record[key] = value
+        yield record
@@ -0,0 +1,350 @@
+import argparse
+import glob
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import date, datetime
+
+# ------------------------
+# Schema
+# ------------------------
+# ts is epoch seconds, day the local YYYY-MM-DD it falls on. Shift reports
+# filter and group on (operator, day) / (job, day), which the indexes cover.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY, station TEXT, operator TEXT, ts REAL, day TEXT);
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY, session_id INTEGER, station TEXT, operator TEXT, ts REAL, day TEXT,
+    job INTEGER, duration_s REAL, retries INTEGER, passed INTEGER, source TEXT);
+CREATE TABLE IF NOT EXISTS cycles (
+    id INTEGER PRIMARY KEY, session_id INTEGER, station TEXT, operator TEXT, ts REAL, day TEXT,
+    jobs INTEGER, duration_s REAL, source TEXT);
+CREATE TABLE IF NOT EXISTS attempts (
+    id INTEGER PRIMARY KEY, session_id INTEGER, station TEXT, ts REAL, day TEXT,
+    job INTEGER, attempt INTEGER, outcome TEXT, latency_ms REAL);
+CREATE TABLE IF NOT EXISTS stage_timings (
+    id INTEGER PRIMARY KEY, session_id INTEGER, station TEXT, operator TEXT, ts REAL, day TEXT,
+    job INTEGER, attempts INTEGER, sensor_spread_ms REAL, dual_to_trigger_ms REAL,
+    switch_ack_ms REAL, inspection_ms REAL, dual_to_verdict_ms REAL, source TEXT);
+CREATE TABLE IF NOT EXISTS imports (
+    path TEXT PRIMARY KEY, size INTEGER, ts REAL, jobs INTEGER, cycles INTEGER);
+
+CREATE INDEX IF NOT EXISTS jobs_operator_day ON jobs (operator, day);
+CREATE INDEX IF NOT EXISTS jobs_day ON jobs (day);
+CREATE INDEX IF NOT EXISTS jobs_job_day ON jobs (job, day);
+CREATE INDEX IF NOT EXISTS cycles_operator_day ON cycles (operator, day);
+CREATE INDEX IF NOT EXISTS cycles_day ON cycles (day);
+CREATE INDEX IF NOT EXISTS attempts_job_day ON attempts (job, day);
+CREATE INDEX IF NOT EXISTS stage_timings_job_day ON stage_timings (job, day);
+"""
+
+STAGE_COLUMNS = ("sensor_spread", "dual_to_trigger", "switch_ack", "inspection", "dual_to_verdict")
+
+
+def connect(path):
+    conn = sqlite3.connect(path, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _day(ts):
+    return date.fromtimestamp(ts).isoformat()
+
+
+def _outcome(result):
+    if result is None:
+        return "timeout"
+    if "true" in result:
+        return "pass"
+    if "false" in result:
+        return "fail"
+    return "unknown"
+
+
+# ------------------------
+# History Store
+# ------------------------
+class HistoryStore:
+    """Production history in SQLite, written in batches by a background thread.
+
+    The record methods only append a tuple to a bounded deque; the writer
+    thread owns the connection and inserts each batch in one transaction
+    every flush_interval. Rows are tied to the latest session() of their
+    station on the writer side, so callers never wait for a row id.
+    """
+
+    def __init__(self, path="history.db", flush_interval=0.5, max_pending=65536):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.recorded = 0
+        self.written = 0
+        self._pending = deque(maxlen=max_pending)
+        self._sessions = {}  # station -> (session id, operator)
+        self._conn = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _record(self, *row):
+        self._pending.append(row)
+        self.recorded += 1
+
+    def session(self, operator, station=""):
+        self._record("session", time.time(), station, operator)
+
+    def job(self, job, duration_s, retries, passed=True, station=""):
+        self._record("job", time.time(), station, job, duration_s, retries, passed)
+
+    def cycle(self, jobs, duration_s, station=""):
+        self._record("cycle", time.time(), station, jobs, duration_s)
+
+    def attempt(self, job, attempt, result, latency_s, station=""):
+        # result is the raw verdict text, or None when the attempt timed out
+        self._record("attempt", time.time(), station, job, attempt, result, latency_s)
+
+    def stages(self, job, attempts, intervals_ms, station=""):
+        self._record("stages", time.time(), station, job, attempts, intervals_ms)
+
+    @property
+    def dropped(self):
+        return max(0, self.recorded - self.written - len(self._pending))
+
+    def health(self):
+        return {"recorded": self.recorded, "written": self.written, "pending": len(self._pending),
+                "dropped": self.dropped}
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="history-db", daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    # ------------------------
+    # Writer Thread
+    # ------------------------
+    def _run(self):
+        self._conn = connect(self.path)
+        try:
+            while not self._stop.wait(self.flush_interval):
+                self._flush()
+            self._flush()
+        finally:
+            self._conn.close()
+            self._conn = None
+
+    def _flush(self):
+        batch = []
+        pending = self._pending
+        while pending:
+            batch.append(pending.popleft())
+        if not batch:
+            return
+        with self._conn:
+            for row in batch:
+                self._insert(*row)
+        self.written += len(batch)
+
+    def _insert(self, kind, ts, station, *fields):
+        day = _day(ts)
+        if kind == "session":
+            (operator,) = fields
+            cur = self._conn.execute(
+                "INSERT INTO sessions (station, operator, ts, day) VALUES (?, ?, ?, ?)",
+                (station, operator, ts, day))
+            self._sessions[station] = (cur.lastrowid, operator)
+            return
+        session_id, operator = self._sessions.get(station, (None, None))
+        if kind == "job":
+            job, duration, retries, passed = fields
+            self._conn.execute(
+                "INSERT INTO jobs (session_id, station, operator, ts, day, job, duration_s, retries, passed, source)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'live')",
+                (session_id, station, operator, ts, day, job, duration, retries, int(passed)))
+        elif kind == "cycle":
+            jobs, duration = fields
+            self._conn.execute(
+                "INSERT INTO cycles (session_id, station, operator, ts, day, jobs, duration_s, source)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, 'live')",
+                (session_id, station, operator, ts, day, jobs, duration))
+        elif kind == "attempt":
+            job, attempt, result, latency = fields
+            self._conn.execute(
+                "INSERT INTO attempts (session_id, station, ts, day, job, attempt, outcome, latency_ms)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (session_id, station, ts, day, job, attempt, _outcome(result),
+                 None if result is None else latency * 1000))
+        elif kind == "stages":
+            job, attempts, intervals = fields
+            self._conn.execute(
+                "INSERT INTO stage_timings (session_id, station, operator, ts, day, job, attempts, sensor_spread_ms,"
+                " dual_to_trigger_ms, switch_ack_ms, inspection_ms, dual_to_verdict_ms, source)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'live')",
+                (session_id, station, operator, ts, day, job, attempts,
+                 *(intervals.get(name) for name in STAGE_COLUMNS)))
+
+
+# ------------------------
+# Text Log Import
+# ------------------------
+def _nan_to_none(value):
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+
+def import_logs(conn, paths, force=False):
+    """Loads job_pass_log.txt / job_cycle_log.txt style files once each.
+
+    Lines are parsed with log_analytics.LogParser, so every historical
+    format it understands is imported. A file already listed in the
+    imports table is skipped unless force is set.
+    """
+    from asms.log_analytics import LogParser
+
+    summary = {}
+    for path in paths:
+        key = os.path.abspath(path)
+        if not force and conn.execute("SELECT 1 FROM imports WHERE path = ?", (key,)).fetchone():
+            summary[path] = None
+            continue
+        operators = []
+        parser = LogParser(operators)
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                parser.feed(line)
+        name = lambda code: operators[code] if code >= 0 else None
+
+        jobs = parser.jobs.columns
+        cycles = parser.cycles.columns
+        stages = parser.stages.columns
+        with conn:
+            conn.execute("DELETE FROM jobs WHERE source = ?", (key,))
+            conn.execute("DELETE FROM cycles WHERE source = ?", (key,))
+            conn.execute("DELETE FROM stage_timings WHERE source = ?", (key,))
+            conn.executemany(
+                "INSERT INTO jobs (station, operator, ts, day, job, duration_s, retries, passed, source)"
+                " VALUES ('', ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(name(op), ts, _day(ts), job, _nan_to_none(dur), retries if retries >= 0 else None, passed, key)
+                 for ts, op, job, dur, retries, passed in zip(
+                    jobs["ts"], jobs["operator"], jobs["job"], jobs["duration"], jobs["retries"], jobs["passed"])])
+            conn.executemany(
+                "INSERT INTO cycles (station, operator, ts, day, jobs, duration_s, source)"
+                " VALUES ('', ?, ?, ?, ?, ?, ?)",
+                [(name(op), ts, _day(ts), n if n >= 0 else None, dur, key)
+                 for ts, op, n, dur in zip(cycles["ts"], cycles["operator"], cycles["jobs"], cycles["duration"])])
+            conn.executemany(
+                "INSERT INTO stage_timings (station, operator, ts, day, job, attempts, sensor_spread_ms,"
+                " dual_to_trigger_ms, switch_ack_ms, inspection_ms, source) VALUES ('', ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(name(op), ts, _day(ts), job, attempts, *map(_nan_to_none, (spread, dual, ack, verdict)), key)
+                 for ts, op, job, attempts, spread, dual, ack, verdict in zip(
+                    stages["ts"], stages["operator"], stages["job"], stages["attempts"], stages["sensor_spread"],
+                    stages["dual_to_trigger"], stages["switch_ack"], stages["trigger_to_verdict"])])
+            conn.execute("INSERT OR REPLACE INTO imports VALUES (?, ?, ?, ?, ?)",
+                         (key, os.path.getsize(path), time.time(), len(jobs["ts"]), len(cycles["ts"])))
+        summary[path] = (len(jobs["ts"]), len(cycles["ts"]), len(stages["ts"]))
+    return summary
+
+
+# ------------------------
+# Reports
+# ------------------------
+REPORTS = {
+    "operator": ("COALESCE(operator, '(unknown)')", "operator"),
+    "day": ("day", "day"),
+    "job": ("job", "job"),
+}
+
+
+def _where(operator=None, since=None, until=None):
+    clauses, params = [], []
+    if operator is not None:
+        clauses.append("operator = ?")
+        params.append(operator)
+    if since is not None:
+        clauses.append("day >= ?")
+        params.append(since.isoformat())
+    if until is not None:
+        clauses.append("day <= ?")
+        params.append(until.isoformat())
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def report(conn, by="operator", operator=None, since=None, until=None):
+    key, _ = REPORTS[by]
+    where, params = _where(operator, since, until)
+    rows = {}
+    for group, n, mean, worst, retry_rate, mean_retries, failed in conn.execute(
+            f"SELECT {key}, COUNT(*), AVG(duration_s), MAX(duration_s), AVG(retries > 0), AVG(retries),"
+            f" SUM(passed = 0) FROM jobs{where} GROUP BY 1 ORDER BY 1", params):
+        rows[group] = {"jobs": n, "job_mean_s": _round(mean), "job_max_s": _round(worst),
+                       "retry_rate": _round(retry_rate), "mean_retries": _round(mean_retries),
+                       "abandoned": failed}
+    if by != "job":
+        for group, n, mean, worst in conn.execute(
+                f"SELECT {key}, COUNT(*), AVG(duration_s), MAX(duration_s) FROM cycles{where} GROUP BY 1 ORDER BY 1",
+                params):
+            rows.setdefault(group, {"jobs": 0}).update(
+                {"cycles": n, "cycle_mean_s": _round(mean), "cycle_max_s": _round(worst)})
+    else:
+        for group, n, mean, worst in conn.execute(
+                f"SELECT job, COUNT(*), AVG(inspection_ms), MAX(inspection_ms) FROM stage_timings{where}"
+                f" GROUP BY 1 ORDER BY 1", params):
+            rows.setdefault(group, {"jobs": 0}).update(
+                {"verdict_mean_ms": _round(mean), "verdict_max_ms": _round(worst)})
+    return dict(sorted(rows.items(), key=lambda item: str(item[0])))
+
+
+def _round(value):
+    return None if value is None else round(value, 3)
+
+
+# ------------------------
+# CLI
+# ------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SQLite production history: import text logs, run shift reports")
+    parser.add_argument("--db", default="history.db")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    imp = sub.add_parser("import", help="load job_pass_log.txt / job_cycle_log.txt history (once per file)")
+    imp.add_argument("logs", nargs="*", help="text logs (default: job_*_log.txt)")
+    imp.add_argument("--force", action="store_true", help="re-import files already imported")
+
+    rep = sub.add_parser("report", help="jobs, retries and cycle times grouped by operator, day or job")
+    rep.add_argument("--by", choices=tuple(REPORTS), default="operator")
+    rep.add_argument("--operator", help="only this operator")
+    rep.add_argument("--since", type=date.fromisoformat, help="first day, YYYY-MM-DD")
+    rep.add_argument("--until", type=date.fromisoformat, help="last day, YYYY-MM-DD")
+    rep.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    conn = connect(args.db)
+    try:
+        if args.command == "import":
+            paths = args.logs or sorted(glob.glob("job_*_log.txt"))
+            for path, counts in import_logs(conn, paths, args.force).items():
+                if counts is None:
+                    print(f"[History] {path}: already imported (use --force to reload)")
+                else:
+                    print(f"[History] {path}: {counts[0]} jobs, {counts[1]} cycles, {counts[2]} stage rows")
+        else:
+            rows = report(conn, args.by, args.operator, args.since, args.until)
+            if args.json:
+                print(json.dumps(rows, indent=2))
+            else:
+                from asms.log_analytics import print_report
+                print_report(f"{args.by} {datetime.now():%Y-%m-%d %H:%M}", rows)
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import time
+from datetime import datetime
+
+from asms import eventlog, profiling, stage_metrics
+
+# Outcomes of one inspection attempt (JobBook.verdict)
+PASSED, FAILED, NO_RESULT, UNKNOWN = range(4)
+
+CYCLE_BUDGETS = frozenset(("cycle", "cycle_cpu"))  # checked per cycle; the other budget stages per part
+
+
+def _ts():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')
+
+
+# ------------------------
+# Job Bookkeeping
+# ------------------------
+class JobBook:
+    """Where a station is in its recipe, and everything recorded about it.
+
+    Shared by the threaded core (asms.core) and the asyncio Station: the
+    engines switch, fire and wait for the camera their own way, and hand
+    each verdict, pass, abandoned part and finished job to the book, which
+    keeps the step and cycle counters, the checkpoint, the event log,
+    history, KPIs, latency budgets and the job log in step.
+    """
+
+    def __init__(self, recipe, scheduler, stages, events, history, kpis, logger, checkpoint=None,
+                 operator="", station="", budgets=None, profiler=None):
+        self.recipe = recipe
+        self.scheduler = scheduler
+        self.stages = stages
+        self.events = events
+        self.history = history
+        self.kpis = kpis
+        self.logger = logger
+        self.checkpoint = checkpoint
+        self.operator = operator
+        self.station = station  # "" for the single-station core
+        self.budget = profiling.LatencyBudget(budgets, self.on_budget_alarm)
+        self.alarmed = set()  # budget stages already alarmed for this part ("cycle": this cycle)
+        self.profiler = profiler
+        self.step = 0  # position in recipe.jobs
+        self.cycle_jobs = 0
+        self.cycle_start = None
+        self.resume_attempt = 0  # attempts already made on the current job before a restart
+        self.jobs_done = 0
+        self.cycles_done = 0
+
+    @property
+    def current_job(self):
+        return self.recipe.jobs[self.step]
+
+    def say(self, tag, msg):
+        # Console line: "[tag] msg" for the core, "[station] msg" for a Station
+        print(f"[{self.station or tag}] {msg}")
+
+    def start_session(self):
+        self.events.context["operator"] = self.operator
+        self.events.start()
+        self.events.emit(eventlog.SESSION)
+        self.history.start()
+        self.history.session(self.operator, self.station)
+        self.logger.info(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}    --- New session started by {self.operator} ---")
+
+    # ------------------------
+    # Checkpoint
+    # ------------------------
+    def resume(self, saved):
+        # Only a checkpoint of the same job sequence can be resumed
+        if not saved or saved.get("recipe") != self.recipe.name or tuple(saved.get("jobs", ())) != self.recipe.jobs:
+            self.cycle_start = time.time()
+            return False
+        self.step = saved["step"]
+        self.cycle_jobs = saved["cycle_jobs"]
+        self.cycle_start = saved["cycle_start"]
+        self.resume_attempt = saved.get("attempt", 0)
+        self.scheduler.cycle_retries = saved.get("cycle_retries", 0)
+        return True
+
+    def save_progress(self, attempt=0):
+        if self.checkpoint:
+            self.checkpoint.update(
+                operator=self.operator, recipe=self.recipe.name, jobs=list(self.recipe.jobs), step=self.step,
+                job=self.current_job, cycle_jobs=self.cycle_jobs, cycle_start=self.cycle_start, attempt=attempt,
+                cycle_retries=self.scheduler.cycle_retries)
+
+    # ------------------------
+    # Attempts and Results
+    # ------------------------
+    def trigger_sent(self, job_number, attempt):
+        self.events.emit(eventlog.TRIGGER_SENT, job_number, attempt)
+        self.save_progress(attempt)
+        self.say("📸", f"Trigger command sent for job {job_number} (Attempt {attempt})")
+
+    def verdict(self, job_number, attempt, result, latency, timeout, scheduler=None, camera=None):
+        """Records one camera's answer (None: timed out); returns PASSED, FAILED, NO_RESULT or UNKNOWN.
+
+        scheduler and camera are a PartCamera's own, when several cameras
+        inspect the part; the caller has already cancelled a timed-out trigger.
+        """
+        scheduler = scheduler or self.scheduler
+        self.history.attempt(job_number, attempt, result, latency, self.station)
+        if result is None:
+            scheduler.timed_out(job_number)
+            self.events.emit(eventlog.NO_RESULT, job_number, attempt)
+            source = f" from {camera.name}" if camera else ""
+            self.say("⚠️", f"No result{source} for job {job_number} within {timeout:.3f}s")
+            self.check_running(job_number)
+            return NO_RESULT
+
+        drift = scheduler.observe(job_number, latency)
+        if drift:
+            self.events.emit(eventlog.LATENCY_DRIFT, job_number, int(drift[1] * 1e6))
+            name = f"Camera {camera.name}" if camera else "Camera"
+            self.say("⚠️", f"{name} latency for job {job_number} drifted: "
+                           f"{drift[0] * 1000:.1f} ms -> {drift[1] * 1000:.1f} ms")
+        if "true" in result:
+            if camera:
+                self.events.emit(eventlog.CAMERA_VERDICT, camera.index, int(latency * 1e6))
+            return PASSED
+        if "false" in result:
+            self.events.emit(eventlog.VERDICT_FAIL, job_number, attempt)
+            where = f" on {camera.name}" if camera else ""
+            self.say("❌", f"Job {job_number} failed{where} (Attempt {attempt})")
+            return FAILED
+        self.events.emit(eventlog.VERDICT_UNKNOWN, job_number, attempt)
+        source = f" from {camera.name}" if camera else ""
+        self.say("⚠️", f"Unknown result{source}: {result}")
+        return UNKNOWN
+
+    def passed(self, job_number, attempt, start_time):
+        """Records the passing attempt; returns the part's time in seconds."""
+        self.stages.stamp(stage_metrics.VERDICT)
+        intervals = self.stages.commit(job_number)
+        self.history.stages(job_number, attempt, intervals, self.station)
+        self.check_budget(job_number, intervals)
+        self.alarmed &= CYCLE_BUDGETS
+        self.events.emit(eventlog.VERDICT_PASS, job_number, attempt)
+        self.events.emit(eventlog.JOB_DONE, job_number, attempt - 1)
+        job_time = time.time() - start_time
+        self.history.job(job_number, job_time, attempt - 1, station=self.station)
+        self.kpis.job(job_number, job_time, attempt - 1, operator=self.operator)
+        msg = f"{_ts()}    Job {job_number} completed by {self.operator} in {job_time:.2f}s with {attempt - 1} retries"
+        self.say("✅", msg)
+        self.logger.info(msg)
+        return job_time
+
+    def abandon(self, job_number, attempt, start_time, detail=""):
+        """Hands the part back to the operator once its retry budget is spent; returns False."""
+        self.check_running(job_number)
+        self.alarmed &= CYCLE_BUDGETS
+        self.stages.reset()
+        job_time = time.time() - start_time
+        self.events.emit(eventlog.RETRY_BUDGET, job_number, attempt)
+        self.history.job(job_number, job_time, attempt - 1, passed=False, station=self.station)
+        self.kpis.job(job_number, job_time, attempt - 1, passed=False, operator=self.operator)
+        msg = f"{_ts()}    Job {job_number} abandoned by {self.operator} after {attempt} attempts{detail}"
+        self.say("⚠️", f"{msg} — retry budget spent")
+        self.logger.info(msg)
+        return False
+
+    def note(self, text):
+        # Extra timestamped job log line, e.g. the per-camera timings of a part
+        msg = f"{_ts()}    {text}"
+        self.say("✅", msg)
+        self.logger.info(msg)
+
+    def check_budget(self, job_number, values_ms):
+        # A part (or cycle) checked several times alarms once per figure
+        values_ms = {stage: value for stage, value in values_ms.items() if stage not in self.alarmed}
+        for stage, _, _ in self.budget.check(job_number, values_ms):
+            self.alarmed.add(stage)
+
+    def check_running(self, job_number):
+        # A part that timed out or was abandoned never reaches passed(); check
+        # how long its stages and the cycle have run so far
+        values = self.stages.elapsed()
+        if self.cycle_start is not None:
+            values["cycle"] = (time.time() - self.cycle_start) * 1000
+        self.check_budget(job_number, values)
+
+    def on_budget_alarm(self, job, stage, value_ms, limit_ms):
+        msg = f"{_ts()}    ALARM job {job} {stage} took {value_ms:.1f} ms, budget {limit_ms:g} ms"
+        self.say("🚨", msg)
+        self.logger.warning(msg)
+        self.events.emit(eventlog.BUDGET_EXCEEDED, profiling.BUDGET_STAGES.index(stage),
+                         min(int(value_ms * 1000), eventlog.ARG_MAX))
+
+    # ------------------------
+    # Finished Jobs and Cycles
+    # ------------------------
+    def finish(self, job_number, passed):
+        """Moves on to the next step after a pass, closing the cycle when it is complete."""
+        if not passed:
+            self.save_progress()
+            self.say("System", f"Job {job_number} not passed. Re-seat the part and trigger BOTH sensors to retry...")
+            return
+        self.jobs_done += 1
+        self.cycle_jobs += 1
+        if self.cycle_jobs == self.recipe.cycle_length:
+            self.finish_cycle(job_number)
+        self.say("System", f"Job {job_number} complete. Waiting for BOTH triggers again...")
+        self.step = self.recipe.next_step(self.step)
+        self.save_progress()
+
+    def finish_cycle(self, job_number):
+        cycle_time = time.time() - self.cycle_start
+        msg = (f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}    Cycle of {self.cycle_jobs} jobs completed "
+               f"by {self.operator} in {cycle_time:.2f} seconds")
+        self.say("Cycle ✅", msg)
+        self.logger.info(msg)
+        self.events.emit(eventlog.CYCLE_DONE, self.cycle_jobs)
+        self.history.cycle(self.cycle_jobs, cycle_time, self.station)
+        self.kpis.cycle(cycle_time, self.operator)
+        usage = self.profiler.end_cycle(cycle_time, self.station) if self.profiler else None
+        self.check_budget(job_number, {"cycle": cycle_time * 1000, "cycle_cpu": usage and usage["cpu_ms"]})
+        self.alarmed.clear()
+        self.scheduler.end_cycle()
+        self.cycles_done += 1
+        self.cycle_jobs = 0
+        self.cycle_start = time.time()
@@ -0,0 +1,213 @@
+import html
+import json
+import math
+import threading
+import time
+from array import array
+from collections import deque
+
+# ------------------------
+# Running Statistics
+# ------------------------
+class RunningStats:
+    """Count, mean, variance, min and max in O(1) per sample (Welford)."""
+
+    __slots__ = ("count", "mean", "m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def summary(self):
+        if not self.count:
+            return {"n": 0}
+        std = math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+        return {"n": self.count, "mean": round(self.mean, 3), "std": round(std, 3),
+                "min": round(self.min, 3), "max": round(self.max, 3)}
+
+
+class RollingWindow:
+    """The last `size` samples in a ring; percentiles are computed on read."""
+
+    def __init__(self, size=256):
+        self.size = size
+        self.values = array("d")
+        self.count = 0
+
+    def add(self, value):
+        if len(self.values) < self.size:
+            self.values.append(value)
+        else:
+            self.values[self.count % self.size] = value
+        self.count += 1
+
+    def percentiles(self, qs=(50, 90, 95)):
+        values = sorted(self.values)
+        if not values:
+            return {f"p{q}": None for q in qs}
+        return {f"p{q}": round(values[min(len(values) - 1, math.ceil(len(values) * q / 100) - 1)], 3) for q in qs}
+
+
+class _Tally:
+    __slots__ = ("jobs", "first_pass", "abandoned", "retries")
+
+    def __init__(self):
+        self.jobs = 0
+        self.first_pass = 0
+        self.abandoned = 0
+        self.retries = RunningStats()
+
+    def add(self, retries, passed):
+        self.jobs += 1
+        self.first_pass += passed and retries == 0
+        self.abandoned += not passed
+        self.retries.add(retries)
+
+    def summary(self):
+        return {"jobs": self.jobs, "abandoned": self.abandoned,
+                "first_pass_yield": round(self.first_pass / self.jobs, 3) if self.jobs else None,
+                "mean_retries": round(self.retries.mean, 3) if self.jobs else None}
+
+
+# ------------------------
+# KPI Aggregator
+# ------------------------
+class KpiAggregator:
+    """Live shift KPIs, updated as each job and cycle finishes.
+
+    job() and cycle() do a constant amount of work under a lock: counters,
+    running stats, one ring slot and one timestamp per event. Rates and
+    percentiles are worked out in snapshot(), on the dashboard's thread.
+    """
+
+    def __init__(self, window=256, rate_window=3600.0):
+        self.window = window
+        self.rate_window = rate_window
+        self.started = time.time()
+        self.total = _Tally()
+        self.job_time = RunningStats()
+        self.cycle_time = RunningStats()
+        self.by_job = {}
+        self.by_operator = {}
+        self._job_times = deque()  # completion times within rate_window
+        self._cycle_times = deque()
+        self._lock = threading.Lock()
+
+    def _operator(self, name):
+        entry = self.by_operator.get(name)
+        if entry is None:
+            entry = self.by_operator[name] = {
+                "tally": _Tally(), "cycles": RunningStats(), "recent": RollingWindow(self.window)}
+        return entry
+
+    def _expire(self, times, now):
+        while times and now - times[0] > self.rate_window:
+            times.popleft()
+
+    def job(self, job, duration_s, retries, passed=True, operator=""):
+        now = time.time()
+        with self._lock:
+            self.total.add(retries, passed)
+            if passed:
+                self.job_time.add(duration_s)
+            if job not in self.by_job:
+                self.by_job[job] = _Tally()
+            self.by_job[job].add(retries, passed)
+            self._operator(operator)["tally"].add(retries, passed)
+            self._job_times.append(now)
+            self._expire(self._job_times, now)
+
+    def cycle(self, duration_s, operator=""):
+        now = time.time()
+        with self._lock:
+            self.cycle_time.add(duration_s)
+            entry = self._operator(operator)
+            entry["cycles"].add(duration_s)
+            entry["recent"].add(duration_s)
+            self._cycle_times.append(now)
+            self._expire(self._cycle_times, now)
+
+    def snapshot(self):
+        now = time.time()
+        with self._lock:
+            self._expire(self._job_times, now)
+            self._expire(self._cycle_times, now)
+            span = min(self.rate_window, max(now - self.started, 1.0))
+            operators = {}
+            for name, entry in self.by_operator.items():
+                operators[name or "(unknown)"] = dict(
+                    entry["tally"].summary(), parts=entry["cycles"].count,
+                    cycle_s=dict(entry["cycles"].summary(), **entry["recent"].percentiles()))
+            return dict(
+                self.total.summary(),
+                uptime_s=round(now - self.started, 1),
+                parts=self.cycle_time.count,
+                parts_per_hour=round(len(self._cycle_times) * 3600 / span, 1),
+                jobs_per_hour=round(len(self._job_times) * 3600 / span, 1),
+                retries_per_job=self.total.retries.summary(),
+                job_s=self.job_time.summary(),
+                cycle_s=self.cycle_time.summary(),
+                by_job={str(job): tally.summary() for job, tally in sorted(self.by_job.items())},
+                by_operator=operators,
+            )
+
+
+# ------------------------
+# Dashboard
+# ------------------------
+PAGE = """<!doctype html>
+<html><head><meta charset="utf-8"><meta http-equiv="refresh" content="{refresh}">
+<title>ASMS KPIs</title>
+<style>body{{font-family:sans-serif;margin:1.5em}}table{{border-collapse:collapse;margin-bottom:1.5em}}
+td,th{{border:1px solid #ccc;padding:.3em .8em;text-align:right}}th{{background:#eee}}</style>
+</head><body><h2>Assembly line KPIs</h2>{body}<p><small>Updated {updated} &middot; JSON at /kpi</small></p></body></html>
+"""
+
+
+def _fmt(value):
+    return "-" if value is None else html.escape(str(value))
+
+
+def _table(headers, rows):
+    head = "".join(f"<th>{html.escape(h)}</th>" for h in headers)
+    body = "".join("<tr>" + "".join(f"<td>{_fmt(cell)}</td>" for cell in row) + "</tr>" for row in rows)
+    return f"<table><tr>{head}</tr>{body}</table>"
+
+
+def render_page(snapshots, refresh=5):
+    body = []
+    for station, snap in snapshots.items():
+        body.append(f"<h3>{html.escape(station)}</h3>")
+        body.append(_table(
+            ("parts/hour", "jobs/hour", "parts", "jobs", "first-pass yield", "retries/job", "abandoned",
+             "cycle mean s", "uptime s"),
+            [(snap["parts_per_hour"], snap["jobs_per_hour"], snap["parts"], snap["jobs"], snap["first_pass_yield"],
+              snap["retries_per_job"].get("mean"), snap["abandoned"], snap["cycle_s"].get("mean"), snap["uptime_s"])]))
+        body.append(_table(
+            ("operator", "parts", "jobs", "first-pass yield", "cycle p50 s", "cycle p90 s", "cycle p95 s", "cycle max s"),
+            [(name, op["parts"], op["jobs"], op["first_pass_yield"], op["cycle_s"]["p50"], op["cycle_s"]["p90"],
+              op["cycle_s"]["p95"], op["cycle_s"].get("max")) for name, op in snap["by_operator"].items()]))
+        body.append(_table(
+            ("job", "jobs", "first-pass yield", "mean retries", "abandoned"),
+            [(job, row["jobs"], row["first_pass_yield"], row["mean_retries"], row["abandoned"])
+             for job, row in snap["by_job"].items()]))
+    return PAGE.format(refresh=refresh, body="".join(body), updated=time.strftime("%Y-%m-%d %H:%M:%S"))
+
+
+def add_kpi_routes(server, aggregators, refresh=5):
+    """Serves /kpi (JSON) and /dashboard (auto-refreshing HTML) on a MetricsServer."""
+    snapshots = lambda: {name: agg.snapshot() for name, agg in aggregators.items()}
+    server.add_route("/kpi", lambda: ("application/json", json.dumps(snapshots(), indent=2)))
+    server.add_route("/dashboard", lambda: ("text/html; charset=utf-8", render_page(snapshots(), refresh)))
+    server.add_route("/", server.routes["/dashboard"])
@@ -0,0 +1,563 @@
+import argparse
+import base64
+import glob
+import json
+import os
+import re
+from array import array
+from datetime import date, datetime
+
+# ------------------------
+# Columnar Tables
+# ------------------------
+JOB_COLUMNS = {"ts": "d", "day": "i", "operator": "i", "job": "i", "duration": "d", "retries": "i", "passed": "i"}
+CYCLE_COLUMNS = {"ts": "d", "day": "i", "operator": "i", "duration": "d", "jobs": "i"}
+STAGE_COLUMNS = {
+    "ts": "d", "day": "i", "operator": "i", "job": "i", "attempts": "i",
+    # milliseconds
+    "sensor_spread": "d", "dual_to_trigger": "d", "switch_ack": "d", "trigger_to_verdict": "d",
+}
+STAGES = ("sensor_spread", "dual_to_trigger", "switch_ack", "trigger_to_verdict")
+
+NAN = float("nan")
+UNKNOWN = -1  # missing int value (retries, job count, operator)
+
+
+class Table:
+    """Append-only columns backed by array.array, so numpy can wrap them without copying."""
+
+    def __init__(self, typecodes):
+        self.typecodes = dict(typecodes)
+        self.columns = {name: array(code) for name, code in self.typecodes.items()}
+
+    def __len__(self):
+        return len(self.columns["ts"])
+
+    def append(self, **row):
+        for name, column in self.columns.items():
+            column.append(row[name])
+        return len(self) - 1
+
+    def extend(self, other):
+        for name, column in self.columns.items():
+            column.extend(other.columns[name])
+
+    def dump(self):
+        # Raw column bytes, base64 for JSON; the typecodes come from the schema, not the file
+        return {name: base64.b64encode(column.tobytes()).decode("ascii") for name, column in self.columns.items()}
+
+    @classmethod
+    def load(cls, typecodes, dumped):
+        table = cls(typecodes)
+        for name, column in table.columns.items():
+            column.frombytes(base64.b64decode(dumped[name], validate=True))
+        if len({len(column) for column in table.columns.values()}) > 1:
+            raise ValueError("columns of different lengths")
+        return table
+
+    def to_numpy(self):
+        import numpy as np
+
+        return {name: np.frombuffer(column, dtype=column.typecode) if len(column) else np.array([], dtype=column.typecode)
+                for name, column in self.columns.items()}
+
+
+# ------------------------
+# Line Formats
+# ------------------------
+TS = r"\d{4}-\d\d-\d\d \d\d:\d\d:\d\d(?:[.,]\d+)?"
+LEADING_TS = re.compile(rf"^({TS})\s+(.*)$")
+
+JOB_FORMATS = (
+    # job_cycle_log.txt: "Job 1 PASSED" / "Job 1 PASSED in 0.85 seconds"
+    re.compile(r"^Job (?P<job>\d+) PASSED(?: in (?P<dur>[\d.]+) seconds)?$"),
+    # "Job 1 passed by operator s" / "... in 1.05 seconds"
+    re.compile(r"^Job (?P<job>\d+) passed by operator (?P<op>.+?)(?: in (?P<dur>[\d.]+) seconds)?$"),
+    # "Job 1 passed by d in 2.21s with 1 retries at 2025-07-09 12:05:15"
+    re.compile(r"^Job (?P<job>\d+) passed by (?P<op>.+?) in (?P<dur>[\d.]+)s with (?P<retries>\d+) retries at .*$"),
+    # update.py / demo.py: "Job 1 completed by vikram in 0.75s with 0 retries"
+    re.compile(r"^Job (?P<job>\d+) completed by (?P<op>.+?) in (?P<dur>[\d.]+)s with (?P<retries>\d+) retries$"),
+    # jobs.JobBook: "Job 1 abandoned by vikram after 3 attempts (cam2 not passed)"
+    re.compile(r"^Job (?P<job>\d+) abandoned by (?P<op>.+?) after (?P<attempts>\d+) attempts(?: \(.*\))?$"),
+)
+CYCLE_FORMATS = (
+    re.compile(r"^Cycle of (?P<jobs>\d+) jobs completed by (?P<op>.+?) in (?P<dur>[\d.]+) seconds$"),
+    re.compile(r"^Cycle \d+ completed by (?P<op>.+?) in (?P<dur>[\d.]+) seconds$"),
+    re.compile(r"^Cycle completed by (?:operator )?(?P<op>.+?) in (?P<dur>[\d.]+) seconds$"),
+)
+SESSION_FORMAT = re.compile(r"^--- New session started by (?P<op>.*?) ---$")
+
+STAGE_SENSOR = re.compile(rf"^Sensor (\d) \(GPIO\d+\) pulse detected at ({TS})$")
+STAGE_DUAL = re.compile(rf"^Both sensors triggered — proceeding to job at ({TS})$")
+STAGE_SWITCH = re.compile(rf"^Job (\d+) switch command sent at ({TS})$")
+STAGE_LOADED = re.compile(rf"^Job (\d+) loaded at ({TS})$")
+STAGE_TRIGGER = re.compile(rf"^Trigger command sent at ({TS})$")
+
+
+def parse_ts(text):
+    return datetime.fromisoformat(text.replace(",", "."))
+
+
+def _ms(later, earlier):
+    if later is None or earlier is None:
+        return NAN
+    return (later - earlier) * 1000.0
+
+
+# ------------------------
+# Streaming Parser
+# ------------------------
+class LogParser:
+    """Parses one log file line by line into job, cycle and stage tables.
+
+    State that spans lines (the session operator, stage timestamps of the
+    inspection in progress, job rows waiting for a cycle line to name their
+    operator) lives on the parser, so snapshot()/restore() can resume it.
+    """
+
+    def __init__(self, operators):
+        self.operators = operators
+        self.jobs = Table(JOB_COLUMNS)
+        self.cycles = Table(CYCLE_COLUMNS)
+        self.stages = Table(STAGE_COLUMNS)
+        self.operator = UNKNOWN
+        self.unassigned = []  # job rows with no operator on their own line
+        self._reset_stage()
+
+    def _reset_stage(self):
+        self.sensor = {}
+        self.dual = None
+        self.switch = None
+        self.loaded = None
+        self.first_trigger = None
+        self.last_trigger = None
+        self.attempts = 0
+
+    TABLES = {"jobs": JOB_COLUMNS, "cycles": CYCLE_COLUMNS, "stages": STAGE_COLUMNS}
+    STATE = ("operator", "unassigned", "dual", "switch", "loaded", "first_trigger", "last_trigger", "attempts")
+
+    def snapshot(self):
+        # JSON-safe: restoring it only fills in known fields, never runs code
+        state = {key: getattr(self, key) for key in self.STATE}
+        state["sensor"] = sorted(self.sensor.items(), key=str)
+        for name in self.TABLES:
+            state[name] = getattr(self, name).dump()
+        return state
+
+    @classmethod
+    def restore(cls, operators, state):
+        parser = cls(operators)
+        for key in cls.STATE:
+            setattr(parser, key, state[key])
+        parser.sensor = {sensor: t for sensor, t in state["sensor"]}
+        for name, typecodes in cls.TABLES.items():
+            setattr(parser, name, Table.load(typecodes, state[name]))
+        return parser
+
+    def operator_code(self, name):
+        name = name.strip()
+        try:
+            return self.operators.index(name)
+        except ValueError:
+            self.operators.append(name)
+            return len(self.operators) - 1
+
+    def feed(self, line):
+        line = line.strip()
+        if not line:
+            return
+        if line[0] == "{":
+            self._feed_event(line)
+            return
+
+        m = LEADING_TS.match(line)
+        if m:
+            self._feed_record(parse_ts(m.group(1)), m.group(1), m.group(2))
+            return
+        self._feed_stage(line)
+
+    def _feed_record(self, when, when_text, rest):
+        ts = when.timestamp()
+        day = when.toordinal()
+
+        m = SESSION_FORMAT.match(rest)
+        if m:
+            self.operator = self.operator_code(m.group("op"))
+            self._reset_stage()
+            return
+
+        for fmt in JOB_FORMATS:
+            m = fmt.match(rest)
+            if m:
+                groups = m.groupdict()
+                operator = self.operator_code(groups["op"]) if groups.get("op") else UNKNOWN
+                job = int(groups["job"])
+                retries = int(groups["retries"]) if groups.get("retries") else UNKNOWN
+                if groups.get("attempts"):
+                    # Abandoned part: no verdict to time, so no stage row either
+                    self.jobs.append(ts=ts, day=day, operator=operator, job=job, duration=NAN,
+                                     retries=int(groups["attempts"]) - 1, passed=0)
+                    self._reset_stage()
+                    return
+                row = self.jobs.append(
+                    ts=ts, day=day, operator=operator, job=job,
+                    duration=float(groups["dur"]) if groups.get("dur") else NAN, retries=retries, passed=1)
+                if operator == UNKNOWN:
+                    if job == 1:
+                        self.unassigned.clear()  # a new cycle began; earlier rows never got a cycle line
+                    self.unassigned.append(row)
+                if self.dual is not None or self.last_trigger is not None:
+                    # Only the sub-second completion stamps are precise enough for stage timing
+                    verdict = ts if ("." in when_text or "," in when_text) else None
+                    self._stage_row(ts, day, operator if operator != UNKNOWN else self.operator, job, verdict)
+                return
+
+        for fmt in CYCLE_FORMATS:
+            m = fmt.match(rest)
+            if m:
+                groups = m.groupdict()
+                operator = self.operator_code(groups["op"])
+                self.cycles.append(
+                    ts=ts, day=day, operator=operator, duration=float(groups["dur"]),
+                    jobs=int(groups["jobs"]) if groups.get("jobs") else UNKNOWN)
+                ops = self.jobs.columns["operator"]
+                for row in self.unassigned:
+                    ops[row] = operator
+                self.unassigned.clear()
+                return
+
+    def _feed_stage(self, line):
+        m = STAGE_TRIGGER.match(line)
+        if m:
+            t = parse_ts(m.group(1)).timestamp()
+            if self.first_trigger is None:
+                self.first_trigger = t
+            self.last_trigger = t
+            self.attempts += 1
+            return
+        m = STAGE_SENSOR.match(line)
+        if m:
+            if self.last_trigger is not None:
+                self._reset_stage()  # previous inspection never completed
+            self.sensor[int(m.group(1))] = parse_ts(m.group(2)).timestamp()
+            return
+        m = STAGE_DUAL.match(line)
+        if m:
+            self.dual = parse_ts(m.group(1)).timestamp()
+            return
+        m = STAGE_SWITCH.match(line)
+        if m:
+            if self.switch is None:
+                self.switch = parse_ts(m.group(2)).timestamp()
+            return
+        m = STAGE_LOADED.match(line)
+        if m and self.loaded is None:
+            self.loaded = parse_ts(m.group(2)).timestamp()
+
+    def _stage_row(self, ts, day, operator, job, verdict):
+        spread = abs(_ms(self.sensor[1], self.sensor[2])) if len(self.sensor) == 2 else NAN
+        self.stages.append(
+            ts=ts, day=day, operator=operator, job=job, attempts=self.attempts,
+            sensor_spread=spread,
+            dual_to_trigger=_ms(self.first_trigger, self.dual),
+            switch_ack=_ms(self.loaded, self.switch),
+            trigger_to_verdict=_ms(verdict, self.last_trigger))
+        self._reset_stage()
+
+    def _feed_event(self, line):
+        # JSONL from eventlog.EventLog; only stage timings are taken from it,
+        # since job and cycle lines are still written to job_pass_log.txt
+        try:
+            event = json.loads(line)
+        except ValueError:
+            return
+        name = event.get("event")
+        t = event.get("mono_ns", 0) / 1e9
+        if name == "session":
+            self._reset_stage()
+        elif name == "sensor":
+            if self.last_trigger is not None:
+                self._reset_stage()
+            self.sensor[event.get("sensor")] = t
+        elif name == "dual_trigger":
+            self.dual = t
+        elif name == "job_switch" and self.switch is None:
+            self.switch = t
+        elif name == "job_loaded" and self.loaded is None:
+            self.loaded = t
+        elif name == "trigger_sent":
+            if self.first_trigger is None:
+                self.first_trigger = t
+            self.last_trigger = t
+            self.attempts += 1
+        elif name == "verdict_pass":
+            when = parse_ts(event["ts"])
+            operator = self.operator_code(event["operator"]) if event.get("operator") else UNKNOWN
+            self._stage_row(when.timestamp(), when.toordinal(), operator, event.get("job", UNKNOWN), t)
+
+
+# ------------------------
+# Incremental Index
+# ------------------------
+class LogIndex:
+    """Byte-offset index over a set of log files.
+
+    Each file keeps the offset of its last complete line and a snapshot of
+    its parser, saved as JSON, so update() only reads bytes appended since
+    the last run. A file that shrank or whose first bytes changed
+    (rotated/rewritten) is reparsed, as is every file when the index can't
+    be read. tables() covers only the files of the last update(), so a
+    report is the same with or without the index; files that no longer
+    exist are dropped from it.
+    """
+
+    VERSION = 3
+    HEAD_BYTES = 128
+
+    def __init__(self, path=None):
+        self.path = path
+        self.operators = []
+        self.files = {}
+        self.paths = []  # absolute paths of the last update()
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    saved = json.load(f)
+                if saved.get("version") == self.VERSION:
+                    self.operators = [str(name) for name in saved["operators"]]
+                    self.files = {
+                        name: {"offset": int(entry["offset"]),
+                               "head": base64.b64decode(entry["head"], validate=True),
+                               "parser": LogParser.restore(self.operators, entry["parser"])}
+                        for name, entry in saved["files"].items()
+                    }
+            except (OSError, ValueError, KeyError, AttributeError, TypeError):
+                self.operators = []
+                self.files = {}
+
+    def update(self, paths):
+        self.paths = list(dict.fromkeys(os.path.abspath(path) for path in paths))
+        for path in self.paths:
+            self._update_file(path)
+        self.files = {name: entry for name, entry in self.files.items() if os.path.exists(name)}
+        if self.path:
+            tmp = self.path + ".tmp"
+            files = {name: {"offset": entry["offset"], "head": base64.b64encode(entry["head"]).decode("ascii"),
+                            "parser": entry["parser"].snapshot()}
+                     for name, entry in self.files.items()}
+            with open(tmp, "w") as f:
+                json.dump({"version": self.VERSION, "operators": self.operators, "files": files}, f)
+            os.replace(tmp, self.path)
+        return self
+
+    def _update_file(self, path):
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        with open(path, "rb") as f:
+            head = f.read(self.HEAD_BYTES)
+            entry = self.files.get(path)
+            if entry is None or size < entry["offset"] or head[:len(entry["head"])] != entry["head"]:
+                entry = {"offset": 0, "head": b"", "parser": LogParser(self.operators)}
+                self.files[path] = entry
+            f.seek(entry["offset"])
+            data = f.read()
+
+        end = data.rfind(b"\n") + 1
+        if end == 0:
+            return
+        parser = entry["parser"]
+        for line in data[:end].decode("utf-8", errors="replace").splitlines():
+            parser.feed(line)
+        entry["offset"] += end
+        entry["head"] = head
+
+    def tables(self):
+        jobs, cycles, stages = Table(JOB_COLUMNS), Table(CYCLE_COLUMNS), Table(STAGE_COLUMNS)
+        for path in self.paths:
+            entry = self.files.get(path)
+            if entry is None:
+                continue
+            parser = entry["parser"]
+            jobs.extend(parser.jobs)
+            cycles.extend(parser.cycles)
+            stages.extend(parser.stages)
+        return jobs, cycles, stages
+
+
+# ------------------------
+# Reports
+# ------------------------
+def _np():
+    try:
+        import numpy as np
+    except ImportError as e:
+        raise ImportError("log reports need numpy: pip install numpy") from e
+    return np
+
+
+def _percentiles(values, qs=(50, 95)):
+    np = _np()
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return [None] * len(qs)
+    return [round(float(v), 2) for v in np.percentile(values, qs)]
+
+
+def _groups(keys, *columns):
+    # Sort once, then split every column at the key boundaries
+    np = _np()
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    uniq, starts = np.unique(sorted_keys, return_index=True)
+    split = [np.split(column[order], starts[1:]) for column in columns]
+    return uniq, list(zip(*split))
+
+
+def _retry_stats(retries):
+    np = _np()
+    known = retries[retries >= 0]
+    if not len(known):
+        return None, None
+    return round(float(np.mean(known > 0)), 3), round(float(np.mean(known)), 2)
+
+
+def filter_tables(tables, operators, operator=None, since=None, until=None):
+    np = _np()
+    out = []
+    code = operators.index(operator) if operator in operators else None
+    for table in tables:
+        cols = table.to_numpy()
+        mask = np.ones(len(cols["ts"]), dtype=bool)
+        if operator is not None:
+            mask &= cols["operator"] == (code if code is not None else -2)
+        if since is not None:
+            mask &= cols["day"] >= since.toordinal()
+        if until is not None:
+            mask &= cols["day"] <= until.toordinal()
+        out.append({name: column[mask] for name, column in cols.items()})
+    return out
+
+
+def report_by_operator(jobs, cycles, operators):
+    rows = {}
+    names = lambda code: operators[code] if code >= 0 else "(unknown)"
+    keys, groups = _groups(jobs["operator"], jobs["duration"], jobs["retries"], jobs["passed"])
+    for key, (duration, retries, passed) in zip(keys, groups):
+        p50, p95 = _percentiles(duration)
+        rate, mean = _retry_stats(retries)
+        rows[names(int(key))] = {"jobs": len(duration), "job_p50_s": p50, "job_p95_s": p95,
+                                 "retry_rate": rate, "mean_retries": mean, "abandoned": int((passed == 0).sum())}
+    keys, groups = _groups(cycles["operator"], cycles["duration"])
+    for key, (duration,) in zip(keys, groups):
+        p50, p95 = _percentiles(duration)
+        row = rows.setdefault(names(int(key)), {"jobs": 0})
+        row.update({"cycles": len(duration), "cycle_p50_s": p50, "cycle_p95_s": p95})
+    return rows
+
+
+def report_by_job(jobs, stages):
+    rows = {}
+    keys, groups = _groups(jobs["job"], jobs["duration"], jobs["retries"], jobs["passed"])
+    for key, (duration, retries, passed) in zip(keys, groups):
+        p50, p95 = _percentiles(duration)
+        rate, mean = _retry_stats(retries)
+        rows[int(key)] = {"jobs": len(duration), "job_p50_s": p50, "job_p95_s": p95,
+                          "retry_rate": rate, "mean_retries": mean, "abandoned": int((passed == 0).sum())}
+    keys, groups = _groups(stages["job"], stages["trigger_to_verdict"])
+    for key, (verdict,) in zip(keys, groups):
+        p50, p95 = _percentiles(verdict)
+        rows.setdefault(int(key), {"jobs": 0}).update({"verdict_p50_ms": p50, "verdict_p95_ms": p95})
+    return rows
+
+
+def report_by_day(jobs, cycles):
+    rows = {}
+    keys, groups = _groups(jobs["day"], jobs["retries"], jobs["operator"], jobs["passed"])
+    for key, (retries, ops, passed) in zip(keys, groups):
+        rate, _ = _retry_stats(retries)
+        rows[date.fromordinal(int(key)).isoformat()] = {
+            "jobs": len(retries), "retry_rate": rate, "abandoned": int((passed == 0).sum()),
+            "operators": len(set(ops.tolist()))}
+    keys, groups = _groups(cycles["day"], cycles["duration"])
+    for key, (duration,) in zip(keys, groups):
+        p50, p95 = _percentiles(duration)
+        rows.setdefault(date.fromordinal(int(key)).isoformat(), {"jobs": 0}).update(
+            {"cycles": len(duration), "cycle_p50_s": p50, "cycle_p95_s": p95})
+    return dict(sorted(rows.items()))
+
+
+def report_stages(stages):
+    rows = {}
+    for stage in STAGES:
+        values = stages[stage]
+        known = int((~_np().isnan(values)).sum())
+        p50, p95, p99 = _percentiles(values, (50, 95, 99))
+        rows[stage] = {"n": known, "p50_ms": p50, "p95_ms": p95, "p99_ms": p99}
+    attempts = stages["attempts"]
+    if len(attempts):
+        rows["attempts"] = {"n": len(attempts), "mean": round(float(attempts.mean()), 2)}
+    return rows
+
+
+def print_report(title, rows):
+    print(f"\n[{title}]")
+    if not rows:
+        print("  (no data)")
+        return
+    columns = []
+    for row in rows.values():
+        for name in row:
+            if name not in columns:
+                columns.append(name)
+    key_width = max(len(str(key)) for key in rows) + 2
+    print(" " * key_width + "".join(f"{name:>16}" for name in columns))
+    for key, row in rows.items():
+        cells = "".join(f"{'-' if row.get(name) is None else row[name]!s:>16}" for name in columns)
+        print(f"{key!s:<{key_width}}{cells}")
+
+
+# ------------------------
+# CLI
+# ------------------------
+DEFAULT_LOGS = ("job_pass_log.txt", "job_cycle_log.txt", "job_events*.jsonl")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cycle time, retry and stage latency reports from station logs")
+    parser.add_argument("logs", nargs="*", help="log files (default: job_*_log.txt and job_events*.jsonl)")
+    parser.add_argument("--report", choices=("operator", "job", "day", "stages", "all"), default="all")
+    parser.add_argument("--operator", help="only this operator")
+    parser.add_argument("--since", type=date.fromisoformat, help="first day, YYYY-MM-DD")
+    parser.add_argument("--until", type=date.fromisoformat, help="last day, YYYY-MM-DD")
+    parser.add_argument("--index", default=".log_index.json", help="incremental index file")
+    parser.add_argument("--no-index", action="store_true", help="parse everything, keep no index")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of tables")
+    args = parser.parse_args(argv)
+
+    paths = []
+    for pattern in args.logs or DEFAULT_LOGS:
+        paths.extend(sorted(glob.glob(pattern)) or ([pattern] if args.logs else []))
+
+    index = LogIndex(None if args.no_index else args.index).update(paths)
+    jobs, cycles, stages = filter_tables(index.tables(), index.operators, args.operator, args.since, args.until)
+
+    reports = {}
+    if args.report in ("operator", "all"):
+        reports["operator"] = report_by_operator(jobs, cycles, index.operators)
+    if args.report in ("job", "all"):
+        reports["job"] = report_by_job(jobs, stages)
+    if args.report in ("day", "all"):
+        reports["day"] = report_by_day(jobs, cycles)
+    if args.report in ("stages", "all"):
+        reports["stages"] = report_stages(stages)
+
+    if args.json:
+        print(json.dumps(reports, indent=2, default=str))
+    else:
+        for title, rows in reports.items():
+            print_report(f"By {title}" if title != "stages" else "Stage latency (ms)", rows)
+
+if __name__ == "__main__":
+    main()
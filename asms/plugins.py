@@ -0,0 +1,61 @@
+import importlib
+
+from asms import eventlog
+
+# ------------------------
+# Pluggable Components
+# ------------------------
+# Built-in implementations per kind, as "module:attribute" strings so that
+# nothing is imported until it is used. Any other "module:attribute" names
+# a drop-in replacement, e.g. a faster transport to benchmark against these.
+#   transport: cls(host, command_port, result_port, trigger_ack=...) with the CameraClient API
+#   event_log: factory(path, context) with emit/start/close and a context dict
+#   trigger:   cls(pins, bounce_time=...) with start(on_pressed, on_released=None) and close()
+REGISTRY = {
+    "transport": {
+        "tcp": "asms.camera:CameraClient",
+    },
+    "event_log": {
+        "jsonl": "asms.plugins:jsonl_event_log",
+        "binary": "asms.plugins:binary_event_log",
+        "off": "asms.plugins:Null",
+    },
+    "trigger": {
+        "gpio": "asms.triggers:GpioTriggers",
+        "stdin": "asms.triggers:StdinTriggers",
+        "manual": "asms.triggers:ManualTriggers",
+    },
+}
+
+
+def resolve(kind, name):
+    target = REGISTRY[kind].get(name, name)
+    module, sep, attr = target.partition(":")
+    if not sep:
+        raise ValueError(f"Unknown {kind} {name!r} (have: {', '.join(REGISTRY[kind])}, or module:attribute)")
+    return getattr(importlib.import_module(module), attr)
+
+
+def jsonl_event_log(path, context=None):
+    return eventlog.EventLog(path, "jsonl", context=context)
+
+
+def binary_event_log(path, context=None):
+    return eventlog.EventLog(path, "binary", context=context)
+
+
+def _ignore(*args, **kwargs):
+    return None
+
+
+class Null:
+    """Stands in for a disabled component: every method call does nothing."""
+
+    def __init__(self, *args, **kwargs):
+        self.context = {}
+
+    def start(self):
+        return self
+
+    def __getattr__(self, name):
+        return _ignore
@@ -0,0 +1,311 @@
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from asms import stage_metrics
+
+# Budgetable figures: the StageTimer intervals of each job, plus per cycle
+# its wall time and (while profiling) the process CPU time it used
+BUDGET_STAGES = tuple(stage_metrics.INTERVALS) + ("cycle", "cycle_cpu")
+
+
+def _thread_cpu_ns(ident):
+    try:
+        return time.clock_gettime_ns(time.pthread_getcpuclockid(ident))
+    except (AttributeError, OSError, TypeError):
+        return None  # not available on this platform, or the thread has exited
+
+
+def _wakeups(native_id):
+    # Voluntary context switches: times the thread blocked and was woken again
+    try:
+        with open(f"/proc/self/task/{native_id}/status") as f:
+            for line in f:
+                if line.startswith("voluntary_ctxt_switches"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _frame_name(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+# ------------------------
+# Stack Sampler
+# ------------------------
+class StackSampler:
+    """Samples every thread's Python stack at a fixed interval.
+
+    A tick reads sys._current_frames() and counts each stack as a tuple of
+    code objects; frames only become text when the profile is written.
+    By default each stack is weighted by the CPU microseconds its thread
+    used since the previous tick, so threads parked in wait() drop out and
+    the flame graph shows CPU time; idle=True counts every thread once per
+    tick instead (wall-clock view). collapsed() gives one
+    'thread;outer;...;inner weight' line per distinct stack, the format
+    flamegraph.pl, speedscope and inferno read.
+    """
+
+    def __init__(self, interval=0.01, max_depth=64, idle=False):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.idle = idle
+        self.stacks = Counter()
+        self.samples = 0
+        self.busy_ns = 0  # time spent taking samples
+        self.started = None
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        if self._thread:
+            return self
+        self.stacks = Counter()
+        self.samples = 0
+        self.busy_ns = 0
+        self._stop.clear()
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if not self._thread:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.elapsed = time.perf_counter() - self.started
+
+    def _run(self):
+        own = threading.get_ident()
+        cpu_seen = {}
+        while not self._stop.wait(self.interval):
+            start = time.perf_counter_ns()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                weight = 1
+                if not self.idle:
+                    cpu = _thread_cpu_ns(ident)
+                    if cpu is not None:
+                        before = cpu_seen.get(ident)
+                        cpu_seen[ident] = cpu
+                        weight = (cpu - before) // 1000 if before is not None else 0
+                        if not weight:
+                            continue
+                codes = []
+                while frame is not None and len(codes) < self.max_depth:
+                    codes.append(frame.f_code)
+                    frame = frame.f_back
+                self.stacks[(names.get(ident, str(ident)), tuple(codes))] += weight
+            self.samples += 1
+            self.busy_ns += time.perf_counter_ns() - start
+
+    def overhead(self):
+        # Fraction of wall time the sampler thread spent sampling
+        elapsed = self.elapsed if not self.running else time.perf_counter() - self.started
+        return self.busy_ns / 1e9 / elapsed if elapsed else 0.0
+
+    def collapsed(self):
+        lines = []
+        for (thread, codes), count in Counter(dict(self.stacks)).most_common():
+            lines.append(";".join([thread] + [_frame_name(code) for code in reversed(codes)]) + f" {count}")
+        return lines
+
+    def top(self, n=5):
+        # Functions weighed most often at the top of a stack (self time), with their share of the total
+        leaves = Counter()
+        for (thread, codes), count in dict(self.stacks).items():
+            if codes:
+                leaves[f"{thread}: {_frame_name(codes[0])}"] += count
+        total = sum(leaves.values()) or 1
+        return [(name, count, count / total) for name, count in leaves.most_common(n)]
+
+
+# ------------------------
+# Cycle CPU and Wake-ups
+# ------------------------
+def thread_usage():
+    """{native thread id: (name, CPU ns, wake-ups)} for the live threads."""
+    usage = {}
+    for thread in threading.enumerate():
+        usage[thread.native_id] = (thread.name, _thread_cpu_ns(thread.ident), _wakeups(thread.native_id))
+    return usage
+
+
+class CycleMeter:
+    """Wall time, process CPU time and wake-ups between begin() and end(), overall and per thread."""
+
+    def __init__(self):
+        self._start = None
+
+    def begin(self):
+        self._start = (time.perf_counter(), time.process_time_ns(), thread_usage())
+        return self
+
+    def end(self):
+        wall0, cpu0, threads0 = self._start
+        wall = time.perf_counter() - wall0
+        cpu_ms = (time.process_time_ns() - cpu0) / 1e6
+        threads = {}
+        wakeups = 0
+        for tid, (name, cpu, woken) in thread_usage().items():
+            _, cpu_before, woken_before = threads0.get(tid, (name, 0, 0))
+            row = {}
+            if cpu is not None and cpu_before is not None:
+                row["cpu_ms"] = round((cpu - cpu_before) / 1e6, 3)
+            if woken is not None and woken_before is not None:
+                row["wakeups"] = woken - woken_before
+                wakeups += row["wakeups"]
+            threads[name if name not in threads else f"{name} ({tid})"] = row
+        return {"wall_ms": round(wall * 1000, 3), "cpu_ms": round(cpu_ms, 3),
+                "cpu_pct": round(cpu_ms / (wall * 10), 2) if wall else None,
+                "wakeups": wakeups, "threads": threads}
+
+
+# ------------------------
+# Latency Budgets
+# ------------------------
+class LatencyBudget:
+    """Per-stage latency limits in ms, checked as each job and cycle finishes.
+
+    jobs.JobBook also checks the figures of a part still in progress when
+    an attempt times out or the part is abandoned.
+
+    Keys are names from BUDGET_STAGES. check() calls on_alarm(job, stage,
+    value_ms, limit_ms) for every figure over its limit, on the thread that
+    finished the job, and returns the breaches.
+    """
+
+    def __init__(self, budgets=None, on_alarm=None):
+        self.budgets = {stage: float(limit) for stage, limit in (budgets or {}).items()}
+        unknown = set(self.budgets) - set(BUDGET_STAGES)
+        if unknown:
+            raise ValueError(f"Unknown budget stage(s) {', '.join(sorted(unknown))} (have: {', '.join(BUDGET_STAGES)})")
+        self.on_alarm = on_alarm
+        self.alarms = Counter()
+
+    def check(self, job, values_ms):
+        breaches = []
+        for stage, limit in self.budgets.items():
+            value = values_ms.get(stage)
+            if value is not None and value > limit:
+                self.alarms[stage] += 1
+                breaches.append((stage, value, limit))
+                if self.on_alarm:
+                    self.on_alarm(job, stage, value, limit)
+        return breaches
+
+
+# ------------------------
+# Profiling Mode
+# ------------------------
+class Profiler:
+    """Profiling mode for a station process, switched on and off at runtime.
+
+    While on, a StackSampler runs and each cycle's CPU time and wake-ups
+    are measured and printed. Switching off writes the collapsed stacks to
+    <prefix>-<time>.folded and the cycle records to <prefix>-<time>.cycles.json.
+    With several stations in one process the CPU and wake-up figures of a
+    station's cycle cover the whole process. The signal handler only wakes
+    a control thread, which does the switching and file writing.
+    """
+
+    def __init__(self, prefix="profile", interval=0.01):
+        self.prefix = prefix
+        self.sampler = StackSampler(interval)
+        self.active = False
+        self.cycles = []
+        self._meters = {}  # cycle key (station name) -> CycleMeter of its cycle in progress
+        self._since_start = None
+        self._toggle_requested = threading.Event()
+        self._control = None
+
+    def install(self, signum=getattr(signal, "SIGUSR1", None), loop=None):
+        """Toggles profiling on `signum`, through `loop` when given; only possible from the main thread."""
+        if signum is None or threading.current_thread() is not threading.main_thread():
+            return False
+        if self._control is None:
+            self._control = threading.Thread(target=self._run_control, name="profiler-control", daemon=True)
+            self._control.start()
+        if loop is not None:
+            loop.add_signal_handler(signum, self._toggle_requested.set)
+        else:
+            signal.signal(signum, lambda *_: self._toggle_requested.set())
+        return True
+
+    def _run_control(self):
+        while True:
+            self._toggle_requested.wait()
+            self._toggle_requested.clear()
+            try:
+                self.toggle()
+            except Exception as e:
+                print(f"[Profile] Toggle failed: {e}")
+
+    def toggle(self):
+        if self.active:
+            self.stop()
+        else:
+            self.start()
+
+    def start(self):
+        if self.active:
+            return
+        self.cycles = []
+        self._meters = {}
+        self._since_start = CycleMeter().begin()
+        self.sampler.start()
+        self.active = True
+        print(f"[Profile] On — sampling stacks every {self.sampler.interval * 1000:.0f} ms; "
+              f"send SIGUSR1 again to stop and write the profile")
+
+    def end_cycle(self, cycle_s, key=""):
+        """Closes the cycle of `key` and returns its record, or None when profiling is off."""
+        if not self.active:
+            return None
+        # The first cycle after switching on is measured from the switch
+        meter = self._meters.get(key, self._since_start)
+        record = dict(meter.end(), station=key, cycle_s=round(cycle_s, 3))
+        self._meters[key] = CycleMeter().begin()
+        self.cycles.append(record)
+        busiest = sorted(((row.get("cpu_ms", 0), name) for name, row in record["threads"].items()), reverse=True)[:3]
+        label = f"[{key}] " if key else ""
+        print(f"[Profile] {label}Cycle {cycle_s:.2f}s: {record['cpu_ms']:.1f} ms CPU, {record['wakeups']} wake-ups; "
+              f"busiest {', '.join(f'{name} {cpu:.1f} ms' for cpu, name in busiest)}")
+        return record
+
+    def stop(self):
+        if not self.active:
+            return None
+        self.active = False
+        self.sampler.stop()
+        path = f"{self.prefix}-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+        try:
+            with open(path + ".folded", "w") as f:
+                f.write("\n".join(self.sampler.collapsed()) + "\n")
+            with open(path + ".cycles.json", "w") as f:
+                json.dump(self.cycles, f, indent=2)
+        except OSError as e:
+            print(f"[Profile] Off — could not write the profile to {path}.*: {e}")
+            return None
+        print(f"[Profile] Off — {self.sampler.samples} samples over {self.sampler.elapsed:.1f}s "
+              f"({self.sampler.overhead() * 100:.2f}% sampler overhead), {len(self.cycles)} cycles")
+        for name, count, share in self.sampler.top():
+            print(f"[Profile]   {share * 100:5.1f}%  {name}")
+        print(f"[Profile] Wrote {path}.folded (flamegraph.pl / speedscope) and {path}.cycles.json")
+        return path
@@ -0,0 +1,77 @@
+import json
+import os
+from dataclasses import dataclass, field
+
+from asms.camera import build_command, build_trigger_command
+
+# ------------------------
+# Recipes
+# ------------------------
+@dataclass
+class Recipe:
+    name: str
+    jobs: list = field(default_factory=lambda: [1, 2, 3])  # camera jobs in inspection order
+    cycle_length: int = 0  # jobs per part; defaults to len(jobs)
+    result_timeout: float = 5.0  # verdict deadline until latency is learned, and its upper bound after
+    job_timeouts: dict = field(default_factory=dict)  # per-job override of result_timeout
+
+    def compile(self):
+        return CompiledRecipe(self)
+
+
+class CompiledRecipe:
+    """A recipe turned into per-step tables at startup.
+
+    Steps index the job list, so the same job may appear more than once.
+    switch_frames[step] is the ready-to-send 'set job' frame for that
+    step; nothing on the inspection path formats or encodes a command.
+    """
+
+    def __init__(self, recipe: Recipe):
+        if not recipe.jobs:
+            raise ValueError(f"Recipe {recipe.name!r} has no jobs")
+        self.name = recipe.name
+        self.jobs = tuple(int(job) for job in recipe.jobs)
+        self.cycle_length = recipe.cycle_length or len(self.jobs)
+        self.result_timeout = recipe.result_timeout
+        self.job_timeouts = {job: float(recipe.job_timeouts.get(job, recipe.result_timeout)) for job in self.jobs}
+        self.switch_frames = tuple(build_command(job) for job in self.jobs)
+        self.trigger_frame = build_trigger_command()
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def next_step(self, step):
+        return (step + 1) % len(self.jobs)
+
+    def describe(self):
+        return f"{self.name}: jobs {', '.join(map(str, self.jobs))} (cycle of {self.cycle_length})"
+
+
+def load_recipes(path):
+    with open(path) as f:
+        data = json.load(f)
+    recipes = {}
+    for entry in data["recipes"]:
+        entry = dict(entry)
+        # JSON object keys are strings
+        entry["job_timeouts"] = {int(job): t for job, t in entry.get("job_timeouts", {}).items()}
+        recipes[entry["name"]] = Recipe(**entry)
+    return recipes, data.get("active")
+
+
+def load_recipe(path, name=None, default_jobs=(1, 2, 3)):
+    """Compiles recipe `name` (or the file's active one) from `path`.
+
+    Falls back to a recipe of default_jobs when the file does not exist and
+    no name was asked for; a named recipe needs its file.
+    """
+    if not os.path.exists(path):
+        if name:
+            raise ValueError(f"Recipe {name!r} requested, but recipe file {path} does not exist")
+        return Recipe("default", list(default_jobs)).compile()
+    recipes, active = load_recipes(path)
+    name = name or active or next(iter(recipes))
+    if name not in recipes:
+        raise ValueError(f"No recipe {name!r} in {path} (have: {', '.join(recipes)})")
+    return recipes[name].compile()
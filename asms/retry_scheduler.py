@@ -0,0 +1,132 @@
+import math
+from array import array
+
+# ------------------------
+# Verdict Latency Estimator
+# ------------------------
+class LatencyEstimator:
+    """Streaming estimate of one job's trigger-to-verdict latency.
+
+    Keeps an EWMA of the latency and of its absolute deviation (the
+    smoothed RTT / RTT variance pair TCP uses for its retransmit timer),
+    plus a small ring of recent samples for a tail percentile.
+    """
+
+    def __init__(self, alpha=0.125, beta=0.25, window=64):
+        self.alpha = alpha
+        self.beta = beta
+        self.samples = array("d")
+        self.window = window
+        self.count = 0
+        self.ewma = None
+        self.deviation = 0.0
+        self.baseline = None  # slow EWMA the drift check compares against
+
+    def observe(self, seconds):
+        if self.ewma is None:
+            self.ewma = self.baseline = seconds
+            self.deviation = seconds / 2
+        else:
+            self.deviation += self.beta * (abs(seconds - self.ewma) - self.deviation)
+            self.ewma += self.alpha * (seconds - self.ewma)
+            self.baseline += self.alpha / 8 * (seconds - self.baseline)
+        if len(self.samples) < self.window:
+            self.samples.append(seconds)
+        else:
+            self.samples[self.count % self.window] = seconds
+        self.count += 1
+
+    def percentile(self, q):
+        if not self.samples:
+            return None
+        values = sorted(self.samples)
+        return values[min(len(values) - 1, math.ceil(len(values) * q / 100) - 1)]
+
+
+# ------------------------
+# Retry Scheduler
+# ------------------------
+class RetryScheduler:
+    """Per-attempt verdict deadlines and retry budgets for one station.
+
+    Until a job has `warmup` verdicts its deadline is its entry in
+    `timeouts` (default initial_timeout). After that it is
+    max(ewma + 4 * deviation, p99 * margin), doubled for each consecutive
+    attempt that timed out, and clamped to [min_timeout, max_timeout],
+    where max_timeout defaults to the job's initial deadline. Only
+    answered attempts are fed back as samples, so a lost verdict never
+    drags the estimate up.
+
+    A job gets at most max_attempts triggers, and a cycle at most
+    cycle_retry_budget retries across all its jobs; once the cycle budget
+    is spent each remaining job gets a single attempt.
+    """
+
+    def __init__(self, initial_timeout=5.0, min_timeout=0.05, max_timeout=None, margin=1.5,
+                 warmup=5, max_attempts=10, cycle_retry_budget=20, drift_ratio=0.25, timeouts=None):
+        self.initial_timeout = initial_timeout
+        self.timeouts = dict(timeouts or {})  # {job: initial timeout}
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.margin = margin
+        self.warmup = warmup
+        self.max_attempts = max_attempts
+        self.cycle_retry_budget = cycle_retry_budget
+        self.drift_ratio = drift_ratio
+        self.estimators = {}
+        self.misses = {}
+        self.cycle_retries = 0
+
+    def estimator(self, job):
+        if job not in self.estimators:
+            self.estimators[job] = LatencyEstimator()
+        return self.estimators[job]
+
+    def timeout(self, job):
+        initial = self.timeouts.get(job, self.initial_timeout)
+        est = self.estimators.get(job)
+        if est is None or est.count < self.warmup:
+            deadline = initial
+        else:
+            deadline = max(est.ewma + 4 * est.deviation, est.percentile(99) * self.margin)
+        deadline *= 2 ** self.misses.get(job, 0)
+        return min(self.max_timeout or initial, max(self.min_timeout, deadline))
+
+    def observe(self, job, seconds):
+        """Feeds back the trigger-to-verdict time of an answered attempt.
+
+        Returns (previous, current) EWMA in seconds when the estimate has
+        drifted more than drift_ratio from its slow baseline, else None.
+        """
+        est = self.estimator(job)
+        est.observe(seconds)
+        self.misses[job] = 0
+        if est.count >= self.warmup and abs(est.ewma - est.baseline) > self.drift_ratio * est.baseline:
+            previous, est.baseline = est.baseline, est.ewma
+            return previous, est.ewma
+        return None
+
+    def timed_out(self, job):
+        self.misses[job] = self.misses.get(job, 0) + 1
+
+    def allow_retry(self, job, attempt):
+        # attempt = number of triggers already sent for this job
+        if attempt >= self.max_attempts or self.cycle_retries >= self.cycle_retry_budget:
+            return False
+        self.cycle_retries += 1
+        return True
+
+    def end_cycle(self):
+        self.cycle_retries = 0
+
+    def snapshot(self):
+        jobs = {}
+        for job, est in sorted(self.estimators.items()):
+            p95 = est.percentile(95)
+            jobs[str(job)] = {
+                "n": est.count,
+                "ewma_ms": round(est.ewma * 1000, 3),
+                "p95_ms": round(p95 * 1000, 3),
+                "timeout_ms": round(self.timeout(job) * 1000, 3),
+            }
+        return {"cycle_retries": self.cycle_retries, "cycle_retry_budget": self.cycle_retry_budget, "jobs": jobs}
@@ -0,0 +1,290 @@
+import argparse
+import json
+import threading
+import time
+import urllib.request
+from array import array
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ------------------------
+# Stages
+# ------------------------
+# Each inspection gets one row of perf_counter_ns() stamps, one per stage.
+# The job switch/ack of a preloaded job land in the row of the job they
+# load, before its sensors fire.
+TRIGGER1 = 0
+TRIGGER2 = 1
+DUAL = 2
+SWITCH_SENT = 3
+ACK = 4
+TRIGGER_SENT = 5  # first attempt
+LAST_TRIGGER = 6  # attempt that produced the verdict
+VERDICT = 7
+STAGES = ("trigger1", "trigger2", "dual", "switch_sent", "ack", "trigger_sent", "last_trigger", "verdict")
+
+INTERVALS = {
+    "sensor_spread": (TRIGGER1, TRIGGER2),
+    "dual_to_trigger": (DUAL, TRIGGER_SENT),
+    "switch_ack": (SWITCH_SENT, ACK),
+    "inspection": (LAST_TRIGGER, VERDICT),
+    "dual_to_verdict": (DUAL, VERDICT),
+}
+
+# Histogram upper bounds in seconds
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _bucket(seconds):
+    for i, bound in enumerate(BUCKETS):
+        if seconds <= bound:
+            return i
+    return len(BUCKETS)
+
+
+def _percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    k = (len(values) - 1) * q / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+# ------------------------
+# Stage Timer
+# ------------------------
+class StageTimer:
+    """Per-inspection stage stamps kept in a fixed-size ring buffer.
+
+    stamp() is a single array store and is safe to call from the GPIO
+    callback thread. commit() copies the row into the ring and updates the
+    rolling histograms, subtracting the row it overwrites, so the
+    histograms always describe the last `capacity` inspections.
+    """
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        width = len(STAGES)
+        self.current = array("q", bytes(8 * width))
+        self.ring = array("q", bytes(8 * width * capacity))
+        self.jobs = array("i", bytes(4 * capacity))
+        self.attempts = array("i", bytes(4 * capacity))
+        self.count = 0
+        self.histograms = {name: [0] * (len(BUCKETS) + 1) for name in INTERVALS}
+        self.sums = {name: 0 for name in INTERVALS}
+        self.totals = {name: 0 for name in INTERVALS}
+        self._attempts = 0
+        self._lock = threading.Lock()
+
+    def stamp(self, stage, t_ns=0):
+        # t_ns: a perf_counter_ns() taken earlier, e.g. at the top of a GPIO callback
+        self.current[stage] = t_ns or time.perf_counter_ns()
+
+    def stamp_trigger(self, t_ns=0):
+        now = t_ns or time.perf_counter_ns()
+        if not self.current[TRIGGER_SENT]:
+            self.current[TRIGGER_SENT] = now
+        self.current[LAST_TRIGGER] = now
+        self._attempts += 1
+
+    def reset(self):
+        # Drop the stamps of an inspection that never completed
+        for i in range(len(STAGES)):
+            self.current[i] = 0
+        self._attempts = 0
+
+    def commit(self, job):
+        # Returns this inspection's intervals in ms (None where a stage is missing)
+        width = len(STAGES)
+        row = self.current
+        with self._lock:
+            slot = self.count % self.capacity
+            base = slot * width
+            if self.count >= self.capacity:
+                self._account(self.ring[base:base + width], -1)
+            self.ring[base:base + width] = row
+            self.jobs[slot] = job
+            self.attempts[slot] = self._attempts
+            self._account(row, 1)
+            self.count += 1
+        intervals = {name: abs(row[end] - row[start]) / 1e6 if row[start] and row[end] else None
+                     for name, (start, end) in INTERVALS.items()}
+        self.reset()
+        return intervals
+
+    def elapsed(self, t_ns=0):
+        # Intervals (ms) of the inspection in progress, without committing it;
+        # one whose end stage hasn't come yet runs up to now
+        now = t_ns or time.perf_counter_ns()
+        row = self.current
+        return {name: abs((row[end] or now) - row[start]) / 1e6 if row[start] else None
+                for name, (start, end) in INTERVALS.items()}
+
+    def _account(self, row, sign):
+        for name, (start, end) in INTERVALS.items():
+            if row[start] and row[end]:
+                ns = abs(row[end] - row[start])
+                self.histograms[name][_bucket(ns / 1e9)] += sign
+                self.sums[name] += sign * ns
+                self.totals[name] += sign
+
+    def intervals(self):
+        # Raw interval values (ms) for the rows currently in the ring
+        width = len(STAGES)
+        with self._lock:
+            rows = min(self.count, self.capacity)
+            ring = self.ring[:rows * width]
+        out = {name: [] for name in INTERVALS}
+        for r in range(rows):
+            base = r * width
+            for name, (start, end) in INTERVALS.items():
+                a, b = ring[base + start], ring[base + end]
+                if a and b:
+                    out[name].append(abs(b - a) / 1e6)
+        return out
+
+    def snapshot(self):
+        window = min(self.count, self.capacity)
+        stats = {}
+        for name, values in self.intervals().items():
+            stats[name] = {
+                "n": len(values),
+                "p50_ms": _round(_percentile(values, 50)),
+                "p95_ms": _round(_percentile(values, 95)),
+                "p99_ms": _round(_percentile(values, 99)),
+                "max_ms": _round(max(values) if values else None),
+            }
+        retries = [a - 1 for a in self.attempts[:window] if a]
+        return {
+            "inspections": self.count,
+            "window": window,
+            "mean_retries": _round(sum(retries) / len(retries) if retries else None),
+            "stages_ms": stats,
+        }
+
+    def prometheus(self, labels="", types=True):
+        with self._lock:
+            histograms = {name: list(counts) for name, counts in self.histograms.items()}
+        lines = []
+        for name in INTERVALS:
+            metric = f"asms_stage_{name}_seconds"
+            if types:
+                lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, count in zip(BUCKETS + (float("inf"),), histograms[name]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{metric}_bucket{{{labels}{"," if labels else ""}le="{le}"}} {cumulative}')
+            brace = f"{{{labels}}}" if labels else ""
+            lines.append(f"{metric}_sum{brace} {self.sums[name] / 1e9:.6f}")
+            lines.append(f"{metric}_count{brace} {self.totals[name]}")
+        brace = f"{{{labels}}}" if labels else ""
+        lines.append(f"asms_inspections_total{brace} {self.count}")
+        return "\n".join(lines)
+
+
+def _round(value):
+    return None if value is None else round(value, 3)
+
+
+# ------------------------
+# HTTP Endpoint
+# ------------------------
+class MetricsServer:
+    """Local HTTP server: /metrics (Prometheus text) and /stats (JSON).
+
+    Other components can add pages with add_route(); handlers run on the
+    server's own threads, never on the inspection path. If the port can't
+    be bound, start() says so and the station runs without the endpoint.
+    """
+
+    def __init__(self, timers, host="127.0.0.1", port=9108):
+        self.timers = timers  # {station name: StageTimer}
+        self.host = host
+        self.port = port
+        self.routes = {
+            "/metrics": lambda: ("text/plain; version=0.0.4", self.metrics_text()),
+            "/stats": lambda: ("application/json", json.dumps(self.stats(), indent=2)),
+        }
+        self._httpd = None
+
+    def add_route(self, path, handler):
+        self.routes[path] = handler
+
+    def metrics_text(self):
+        return "\n".join(
+            timer.prometheus(f'station="{name}"', types=i == 0)
+            for i, (name, timer) in enumerate(self.timers.items())) + "\n"
+
+    def stats(self):
+        return {name: timer.snapshot() for name, timer in self.timers.items()}
+
+    def start(self):
+        routes = self.routes
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                handler = routes.get(self.path.split("?")[0])
+                if handler is None:
+                    self.send_error(404)
+                    return
+                content_type, body = handler()
+                data = body.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            self._httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        except OSError as e:
+            # The endpoint is optional; e.g. another station process already serves this port
+            print(f"[⚠️] Metrics endpoint not started on {self.host}:{self.port}: {e} — running without it")
+            return self
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        threading.Thread(target=self._httpd.serve_forever, name="metrics-http", daemon=True).start()
+        print(f"[Startup] Serving {', '.join(sorted(self.routes))} on http://{self.host}:{self.port}")
+        return self
+
+    def close(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+
+
+# ------------------------
+# CLI
+# ------------------------
+def print_stats(stats):
+    for station, snap in stats.items():
+        print(f"[{station}] {snap['inspections']} inspections (last {snap['window']}), "
+              f"mean retries {snap['mean_retries']}")
+        print(f"  {'stage':<18}{'n':>7}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}{'max ms':>11}")
+        for name, row in snap["stages_ms"].items():
+            cells = "".join(f"{'-' if row[k] is None else row[k]:>11}" for k in ("p50_ms", "p95_ms", "p99_ms", "max_ms"))
+            print(f"  {name:<18}{row['n']:>7}{cells}")
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Per-stage latency statistics from a running station")
+    sub = parser.add_subparsers(dest="command", required=True)
+    stats = sub.add_parser("stats", help="print rolling stage latency percentiles")
+    stats.add_argument("--url", default="http://127.0.0.1:9108")
+    stats.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    with urllib.request.urlopen(args.url.rstrip("/") + "/stats", timeout=2) as response:
+        data = json.load(response)
+    if args.json:
+        print(json.dumps(data, indent=2))
+    else:
+        print_stats(data)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,514 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import queue
+import time
+from dataclasses import dataclass, field
+from logging.handlers import QueueHandler, QueueListener
+
+from asms import coincidence, eventlog, historydb, jobs, kpi, profiling, stage_metrics
+from asms.camera import AsyncCameraClient
+from asms.checkpoint import Checkpoint
+from asms.recipes import Recipe, load_recipe
+from asms.retry_scheduler import RetryScheduler
+
+# ------------------------
+# Station Configuration
+# ------------------------
+@dataclass
+class CameraConfig:
+    name: str
+    camera_ip: str
+    command_port: int = 2300
+    result_port: int = 2300
+    jobs: list = None  # this camera's job for each recipe step; defaults to the station's jobs
+
+
+@dataclass
+class StationConfig:
+    name: str
+    camera_ip: str = ""  # unused when cameras is set
+    command_port: int = 2300
+    result_port: int = 2300
+    trigger1_pin: int = 17
+    trigger2_pin: int = 27
+    pair_window: float = 0.5  # seconds both sensors must fire within to count as one part; None for no limit
+    bounce_time: float = 0.1  # gpiozero debounce on the sensor pins; None to disable
+    operator: str = ""
+    jobs: list = field(default_factory=lambda: [1, 2, 3])
+    recipe: str = ""  # recipe name in recipe_file; replaces jobs/result_timeout when set
+    recipe_file: str = "recipes.json"  # relative to the stations file
+    result_timeout: float = 5.0  # verdict deadline until latency is learned, and its upper bound after
+    max_attempts: int = 10  # triggers per part before it is handed back to the operator
+    cycle_retry_budget: int = 20  # retries allowed across one cycle
+    ack_timeout: float = 1.0  # seconds to wait for the 'set job' ack
+    trigger_ack: bool = False  # the camera acks 'trigger' as well as 'set job'
+    preload_next_job: bool = True
+    log_file: str = "job_pass_log.txt"
+    event_log: str = ""  # defaults to job_events_<name>.jsonl
+    history_db: str = "history.db"
+    checkpoint: str = ""  # defaults to <name>.checkpoint.json
+    checkpoint_max_age: float = 3600  # seconds; an older checkpoint starts a fresh cycle
+    cameras: list = field(default_factory=list)  # CameraConfig entries; when set, all of them inspect every part
+    stage_budgets_ms: dict = field(default_factory=dict)  # alarm limits per profiling.BUDGET_STAGES name
+
+
+def load_station_configs(path):
+    with open(path) as f:
+        data = json.load(f)
+    configs = [StationConfig(**entry) for entry in data["stations"]]
+    # Recipes sit next to the stations file, wherever the process was started
+    base = os.path.dirname(os.path.abspath(path))
+    for config in configs:
+        config.recipe_file = os.path.join(base, config.recipe_file)
+    return configs
+
+
+# ------------------------
+# Part Cameras
+# ------------------------
+class PartCamera:
+    """One of several cameras that inspect the same part.
+
+    Each camera has its own address and job table and learns its own
+    verdict latency; the station switches, fires and collects them as a
+    group (see Station.run_part).
+    """
+
+    def __init__(self, config: CameraConfig, recipe, index=0, label=None, client=None, trigger_ack=False):
+        self.config = config
+        self.name = config.name
+        self.index = index
+        self.client = client or AsyncCameraClient(
+            config.camera_ip, config.command_port, config.result_port, label=label or config.name,
+            trigger_ack=trigger_ack)
+        jobs = config.jobs or list(recipe.jobs)
+        if len(jobs) != len(recipe.jobs):
+            raise ValueError(f"Camera {config.name!r} has {len(jobs)} jobs, recipe {recipe.name!r} has {len(recipe.jobs)} steps")
+        # Step-for-step copy of the station recipe with this camera's job numbers
+        timeouts = {int(job): recipe.job_timeouts[station_job] for job, station_job in zip(jobs, recipe.jobs)}
+        self.recipe = Recipe(f"{recipe.name}:{config.name}", jobs, recipe.cycle_length, recipe.result_timeout,
+                             timeouts).compile()
+        self.scheduler = RetryScheduler(self.recipe.result_timeout, timeouts=self.recipe.job_timeouts)
+        self.loaded_job = None
+
+    async def switch(self, step, ack_timeout):
+        self.loaded_job = None
+        if await self.client.request(self.recipe.switch_frames[step], ack_timeout) is None:
+            return False
+        self.loaded_job = self.recipe.jobs[step]
+        return True
+
+    async def collect(self, trigger, sent, timeout):
+        """Waits for this camera's verdict; returns (result, latency)."""
+        result = await trigger.wait_result(timeout)
+        latency = time.perf_counter() - sent
+        if result is None:
+            self.client.cancel(trigger)
+        return result, latency
+
+
+# ------------------------
+# Station
+# ------------------------
+class Station:
+    """One camera + sensor pair, driven as a task on a shared event loop.
+
+    GPIO callbacks arrive on gpiozero's threads and are handed to the loop
+    with call_soon_threadsafe(); everything else runs on the loop. With
+    config.cameras set the station drives several cameras per part
+    instead of one. Progress and job records are kept by a jobs.JobBook,
+    as in the threaded core.
+    """
+
+    def __init__(self, config: StationConfig, camera=None, events=None, history=None):
+        self.config = config
+        self.name = config.name
+        self.camera = camera
+        self.events = events or eventlog.EventLog(
+            config.event_log or f"job_events_{config.name}.jsonl",
+            context={"station": config.name, "operator": config.operator})
+        self.history = history or historydb.HistoryStore(config.history_db)
+        if config.recipe:
+            self.recipe = load_recipe(config.recipe_file, config.recipe)
+        else:
+            self.recipe = Recipe(config.name, config.jobs, result_timeout=config.result_timeout).compile()
+        cameras = [CameraConfig(**cam) if isinstance(cam, dict) else cam for cam in config.cameras]
+        self.part_cameras = [PartCamera(cam, self.recipe, index, label=f"{config.name}/{cam.name}",
+                                        trigger_ack=config.trigger_ack)
+                             for index, cam in enumerate(cameras)]
+        if not self.part_cameras and self.camera is None:
+            self.camera = AsyncCameraClient(
+                config.camera_ip, config.command_port, config.result_port, label=config.name,
+                trigger_ack=config.trigger_ack)
+        self.checkpoint = Checkpoint(config.checkpoint or f"{config.name}.checkpoint.json")
+        self.stages = stage_metrics.StageTimer()
+        self.kpis = kpi.KpiAggregator()
+        self.scheduler = RetryScheduler(
+            self.recipe.result_timeout, timeouts=self.recipe.job_timeouts,
+            max_attempts=config.max_attempts, cycle_retry_budget=config.cycle_retry_budget)
+        # The shared profiling.Profiler is set on the book by run_stations()
+        self.book = jobs.JobBook(
+            self.recipe, self.scheduler, self.stages, self.events, self.history, self.kpis,
+            logging.getLogger(f"station.{config.name}"), checkpoint=self.checkpoint, operator=config.operator,
+            station=config.name, budgets=config.stage_budgets_ms)
+        self.loop = None
+        self.buttons = []
+        self.detector = coincidence.CoincidenceDetector(config.pair_window, self._on_pair)
+        self.triggered = None
+        self.loaded_job = None
+
+    @property
+    def current_job(self):
+        return self.book.current_job
+
+    def print(self, msg):
+        print(f"[{self.name}] {msg}")
+
+    # ------------------------
+    # Trigger Handling
+    # ------------------------
+    def attach_gpio(self, pin_factory=None):
+        from gpiozero import Button
+
+        for sensor, pin in ((1, self.config.trigger1_pin), (2, self.config.trigger2_pin)):
+            button = Button(pin, pull_up=False, bounce_time=self.config.bounce_time, pin_factory=pin_factory)
+            button.when_pressed = lambda sensor=sensor: self.edge(sensor)
+            self.buttons.append(button)
+
+    def edge(self, sensor):
+        # Called from gpiozero's callback thread
+        t_ns = time.perf_counter_ns()
+        pin = self.config.trigger1_pin if sensor == 1 else self.config.trigger2_pin
+        if self.detector.edge(sensor, t_ns) == coincidence.REJECTED:
+            self.events.emit(eventlog.SENSOR_IGNORED, sensor, pin)
+            return
+        self.events.emit(eventlog.SENSOR, sensor, pin)
+
+    def _on_pair(self, t1_ns, t2_ns):
+        # Still on the callback thread; the asyncio camera client sends from the loop
+        self.stages.stamp(stage_metrics.TRIGGER1, t1_ns)
+        self.stages.stamp(stage_metrics.TRIGGER2, t2_ns)
+        self.stages.stamp(stage_metrics.DUAL, max(t1_ns, t2_ns))
+        self.events.emit(eventlog.DUAL_TRIGGER)
+        self.loop.call_soon_threadsafe(self.triggered.set)
+
+    # ------------------------
+    # Job Execution
+    # ------------------------
+    async def switch_job(self, step, cameras=None):
+        # cameras: the part cameras to switch (default all of them)
+        job_number = self.recipe.jobs[step]
+        self.loaded_job = None
+        self.stages.stamp(stage_metrics.SWITCH_SENT)
+        self.events.emit(eventlog.JOB_SWITCH, job_number)
+        if self.part_cameras:
+            cameras = self.part_cameras if cameras is None else cameras
+            acks = await asyncio.gather(*(cam.switch(step, self.config.ack_timeout) for cam in cameras))
+            missing = [cam.name for cam, ack in zip(cameras, acks) if not ack]
+            if missing:
+                self.print(f"No ack for job {job_number} switch from {', '.join(missing)} within {self.config.ack_timeout}s")
+                return False
+        elif await self.camera.request(self.recipe.switch_frames[step], self.config.ack_timeout) is None:
+            self.print(f"No ack for job {job_number} switch within {self.config.ack_timeout}s")
+            return False
+        self.stages.stamp(stage_metrics.ACK)
+        self.events.emit(eventlog.JOB_LOADED, job_number)
+        self.loaded_job = job_number
+        return True
+
+    async def run_job(self, step, attempt=0):
+        job_number = self.recipe.jobs[step]
+        start_time = time.time()
+
+        while True:
+            attempt += 1
+            try:
+                if not self.config.preload_next_job:
+                    await self.switch_job(step)
+                    await asyncio.sleep(0.2)
+                elif self.loaded_job != job_number and not await self.switch_job(step):
+                    # An unanswered switch uses up an attempt like an unanswered trigger
+                    if not self.scheduler.allow_retry(job_number, attempt):
+                        return self.book.abandon(job_number, attempt, start_time)
+                    continue
+
+                timeout = self.scheduler.timeout(job_number)
+                trigger = self.camera.send(self.recipe.trigger_frame, expect_result=True)
+                sent = time.perf_counter()
+                self.stages.stamp_trigger()
+                self.book.trigger_sent(job_number, attempt)
+
+                result = await trigger.wait_result(timeout)
+                latency = time.perf_counter() - sent
+                if result is None:
+                    self.camera.cancel(trigger)
+                if self.book.verdict(job_number, attempt, result, latency, timeout) == jobs.PASSED:
+                    self.book.passed(job_number, attempt, start_time)
+                    return True
+
+                if not self.scheduler.allow_retry(job_number, attempt):
+                    return self.book.abandon(job_number, attempt, start_time)
+            except ConnectionError as e:
+                self.events.emit(eventlog.CAMERA_LOST, job_number)
+                self.print(f"Camera connection lost during job {job_number}: {e} — waiting to reconnect...")
+                self.loaded_job = None
+                await self.camera.wait_connected()
+            except Exception as e:
+                # Not inspected: the part stays on this job like an abandoned one
+                self.stages.reset()
+                self.print(f"Error during job {job_number}: {e!r}")
+                return False
+
+    async def run_part(self, step, attempt=0):
+        """run_job() for a station with several cameras per part.
+
+        All cameras are fired together and their verdicts gathered under
+        one deadline, the longest of their learned timeouts. A retry fires
+        only the cameras that have not passed yet, so the part takes as
+        long as its slowest camera rather than the sum of them.
+        """
+        job_number = self.recipe.jobs[step]
+        start_time = time.time()
+        pending = list(self.part_cameras)
+        timings = {}  # camera name -> trigger-to-verdict seconds of its passing attempt
+
+        while True:
+            attempt += 1
+            try:
+                if not self.config.preload_next_job:
+                    await self.switch_job(step, pending)
+                    await asyncio.sleep(0.2)
+                else:
+                    unloaded = [cam for cam in pending if cam.loaded_job != cam.recipe.jobs[step]]
+                    if unloaded and not await self.switch_job(step, unloaded):
+                        if not self.scheduler.allow_retry(job_number, attempt):
+                            not_loaded = [cam.name for cam in unloaded if cam.loaded_job is None]
+                            return self.book.abandon(job_number, attempt, start_time,
+                                                     f" ({', '.join(not_loaded)} not loaded)")
+                        continue
+
+                timeout = max(cam.scheduler.timeout(cam.recipe.jobs[step]) for cam in pending)
+                triggers = []
+                try:
+                    for cam in pending:
+                        triggers.append(cam.client.send(cam.recipe.trigger_frame, expect_result=True))
+                except ConnectionError:
+                    for cam, trigger in zip(pending, triggers):
+                        cam.client.cancel(trigger)
+                    raise
+                sent = time.perf_counter()
+                self.stages.stamp_trigger()
+                self.book.trigger_sent(job_number, attempt)
+
+                results = await asyncio.gather(*(cam.collect(trigger, sent, timeout)
+                                                 for cam, trigger in zip(pending, triggers)))
+                failed = []
+                for cam, (result, latency) in zip(pending, results):
+                    outcome = self.book.verdict(cam.recipe.jobs[step], attempt, result, latency, timeout,
+                                                scheduler=cam.scheduler, camera=cam)
+                    if outcome == jobs.PASSED:
+                        timings[cam.name] = latency
+                    else:
+                        failed.append(cam)
+
+                if not failed:
+                    job_time = self.book.passed(job_number, attempt, start_time)
+                    slowest = max(timings, key=timings.get)
+                    self.book.note(f"Job {job_number} cameras: "
+                                   + ", ".join(f"{name} {t * 1000:.1f} ms" for name, t in timings.items())
+                                   + f" (slowest {slowest}, part {job_time * 1000:.1f} ms)")
+                    return True
+
+                if not self.scheduler.allow_retry(job_number, attempt):
+                    return self.book.abandon(job_number, attempt, start_time,
+                                             f" ({', '.join(cam.name for cam in failed)} not passed)")
+                pending = failed
+            except ConnectionError as e:
+                self.events.emit(eventlog.CAMERA_LOST, job_number)
+                self.print(f"Camera connection lost during job {job_number}: {e} — waiting to reconnect...")
+                for cam in pending:
+                    cam.loaded_job = None
+                await asyncio.gather(*(cam.client.wait_connected() for cam in pending))
+            except Exception as e:
+                self.stages.reset()
+                self.print(f"Error during job {job_number}: {e!r}")
+                return False
+
+    def health(self):
+        cameras = {cam.name: cam.client for cam in self.part_cameras} or {"camera": self.camera}
+        return {"cameras": {name: client.health() for name, client in cameras.items()},
+                "event_log": self.events.health(), "history": self.history.health()}
+
+    # ------------------------
+    # Station Loop
+    # ------------------------
+    async def start(self, connect_timeout=5.0, fresh=False):
+        self.loop = asyncio.get_running_loop()
+        self.triggered = asyncio.Event()
+        book = self.book
+        if book.resume(None if fresh else self.checkpoint.load(self.config.checkpoint_max_age)):
+            self.print(f"Resuming cycle at job {book.current_job}: {book.cycle_jobs} of {self.recipe.cycle_length} "
+                       f"jobs done, {book.resume_attempt} attempts on this part")
+        self.checkpoint.start()
+        book.save_progress(book.resume_attempt)
+        book.start_session()
+        if self.part_cameras:
+            started = await asyncio.gather(*(cam.client.start(connect_timeout) for cam in self.part_cameras))
+            offline = [cam.name for cam, ok in zip(self.part_cameras, started) if not ok]
+            if offline:
+                self.print(f"Camera(s) {', '.join(offline)} not reachable yet — retrying in the background")
+            elif self.config.preload_next_job:
+                await self.switch_job(book.step)
+        elif not await self.camera.start(connect_timeout):
+            self.print("Camera not reachable yet — retrying in the background")
+        elif self.config.preload_next_job:
+            await self.switch_job(book.step)
+
+    async def run(self):
+        self.print(f"Recipe {self.recipe.describe()}")
+        for cam in self.part_cameras:
+            self.print(f"Camera {cam.name} at {cam.config.camera_ip}: jobs {', '.join(map(str, cam.recipe.jobs))}")
+        run_job = self.run_part if self.part_cameras else self.run_job
+        self.print("Waiting for BOTH GPIO triggers...")
+
+        while True:
+            await self.triggered.wait()
+            self.print(f"Both sensors triggered ({self.detector.last_spread_ns / 1e6:.1f} ms apart) — proceeding to job")
+
+            job_number = self.current_job
+            ignored = self.detector.stats["rejected"]
+            passed = await run_job(self.book.step, self.book.resume_attempt)
+            self.book.resume_attempt = 0
+            ignored = self.detector.stats["rejected"] - ignored
+            if ignored:
+                self.print(f"Ignored {ignored} sensor pulse(s) — job already in progress")
+            self.triggered.clear()
+
+            self.book.finish(job_number, passed)
+            self.detector.arm()
+            if passed and self.config.preload_next_job and self.loaded_job != self.current_job:
+                try:
+                    await self.switch_job(self.book.step)
+                except ConnectionError as e:
+                    self.print(f"Error preloading job {self.current_job}: {e}")
+
+    async def close(self):
+        self.print(f"Health: {json.dumps(self.health())}")
+        for button in self.buttons:
+            button.close()
+        for camera in [cam.client for cam in self.part_cameras] or [self.camera]:
+            await camera.close()
+        self.events.close()
+        self.history.close()
+        self.checkpoint.close()
+
+
+# ------------------------
+# Multi-Station Runner
+# ------------------------
+def setup_station_logging(configs):
+    """Points each station's job logger at its log file; returns the started listeners.
+
+    The loggers only enqueue records: a QueueListener thread per file does
+    the writing, so a slow disk never stalls the event loop. Stop the
+    listeners on exit to flush what is queued.
+    """
+    listeners = {}
+    handlers = {}
+    for config in configs:
+        if config.log_file not in handlers:
+            records = queue.SimpleQueue()
+            file_handler = logging.FileHandler(config.log_file, mode='a')
+            file_handler.setFormatter(logging.Formatter('%(message)s'))
+            listeners[config.log_file] = QueueListener(records, file_handler)
+            listeners[config.log_file].start()
+            handlers[config.log_file] = QueueHandler(records)
+        logger = logging.getLogger(f"station.{config.name}")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        logger.addHandler(handlers[config.log_file])
+    return list(listeners.values())
+
+
+async def run_stations(stations, attach_gpio=True, pin_factory=None, fresh=False, profiler=None):
+    startup = time.perf_counter()
+    if profiler:
+        for station in stations:
+            station.book.profiler = profiler
+        try:
+            profiler.install(loop=asyncio.get_running_loop())
+        except (NotImplementedError, RuntimeError, ValueError):
+            pass  # no signal handlers on this loop
+
+    async def timed(coro):
+        start = time.perf_counter()
+        await coro
+        return time.perf_counter() - start
+
+    def setup_gpio():
+        for station in stations:
+            station.attach_gpio(pin_factory)
+
+    # Camera handshakes and GPIO pin setup run side by side; start() sets
+    # each station's loop before the GPIO thread can deliver an edge
+    cameras = timed(asyncio.gather(*(station.start(fresh=fresh) for station in stations)))
+    gpio = timed(asyncio.to_thread(setup_gpio)) if attach_gpio else timed(asyncio.sleep(0))
+    camera_time, gpio_time = await asyncio.gather(cameras, gpio)
+    print(f"[Startup] Ready in {time.perf_counter() - startup:.3f}s "
+          f"(cameras {camera_time:.3f}s, GPIO {gpio_time:.3f}s in parallel)")
+    try:
+        # One station's failure must not stop the others
+        results = await asyncio.gather(*(station.run() for station in stations), return_exceptions=True)
+        for station, result in zip(stations, results):
+            if isinstance(result, Exception):
+                print(f"[🚨] Station {station.name} stopped: {result!r}")
+    finally:
+        if profiler:
+            profiler.stop()
+        for station in stations:
+            await station.close()
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Run several assembly stations from one process")
+    parser.add_argument("config", help="JSON file with a 'stations' list")
+    parser.add_argument("--metrics-port", type=int, default=9108,
+                        help="port for /metrics, /stats, /kpi and /dashboard (0 to disable)")
+    parser.add_argument("--metrics-host", default="127.0.0.1", help="0.0.0.0 to open the dashboard from the LAN")
+    parser.add_argument("--fresh", action="store_true", help="ignore checkpoints and start every station at its first job")
+    parser.add_argument("--profile", action="store_true", help="start in profiling mode (SIGUSR1 toggles it)")
+    args = parser.parse_args(argv)
+
+    configs = load_station_configs(args.config)
+    log_listeners = setup_station_logging(configs)
+    # One writer per database file, shared by the stations that log to it
+    histories = {}
+    for config in configs:
+        histories.setdefault(config.history_db, historydb.HistoryStore(config.history_db))
+    stations = [Station(config, history=histories[config.history_db]) for config in configs]
+    print(f"[System] Starting {len(stations)} station(s): {', '.join(s.name for s in stations)}")
+    if args.metrics_port:
+        server = stage_metrics.MetricsServer({s.name: s.stages for s in stations}, host=args.metrics_host,
+                                             port=args.metrics_port)
+        kpi.add_kpi_routes(server, {s.name: s.kpis for s in stations})
+        server.add_route("/sensors", lambda: ("application/json",
+                                              json.dumps({s.name: s.detector.snapshot() for s in stations})))
+        server.add_route("/health", lambda: ("application/json",
+                                             json.dumps({s.name: s.health() for s in stations}, indent=2)))
+        server.start()
+    try:
+        profiler = profiling.Profiler()
+        if args.profile:
+            profiler.start()
+        asyncio.run(run_stations(stations, fresh=args.fresh, profiler=profiler))
+    except KeyboardInterrupt:
+        print("\n[System] Exiting gracefully by Ctrl+C")
+    finally:
+        for listener in log_listeners:
+            listener.stop()
+
+if __name__ == "__main__":
+    main()
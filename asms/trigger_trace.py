@@ -0,0 +1,296 @@
+import argparse
+import os
+import struct
+import threading
+import time
+from array import array
+
+# ------------------------
+# Trace File Format
+# ------------------------
+# Header: magic, wall-clock ns at recording start. Then any number of chunks:
+# a record count followed by three packed arrays (edge time in ns since the
+# start, BCM pin number, level 1=pressed/0=released). Chunks are appended
+# as the recorder flushes, so a crash loses at most one flush interval.
+TRACE_MAGIC = b"ASMSTRC1"
+TRACE_HEADER = struct.Struct("<q")
+CHUNK_HEADER = struct.Struct("<I")
+
+
+class Trace:
+    def __init__(self, start_wall_ns=0):
+        self.start_wall_ns = start_wall_ns
+        self.times = array("q")
+        self.pins = array("B")
+        self.levels = array("B")
+
+    def __len__(self):
+        return len(self.times)
+
+    def append(self, t_ns, pin, level):
+        self.times.append(t_ns)
+        self.pins.append(pin)
+        self.levels.append(level)
+
+    def pairs(self, pin1, pin2, window_ns=50_000_000):
+        # Gap between each press on pin1 and the nearest press on pin2 within the window
+        gaps = []
+        last = {pin1: None, pin2: None}
+        for t, pin, level in zip(self.times, self.pins, self.levels):
+            if level != 1 or pin not in last:
+                continue
+            other = last[pin2 if pin == pin1 else pin1]
+            if other is not None and t - other <= window_ns:
+                gaps.append(t - other)
+                last = {pin1: None, pin2: None}
+            else:
+                last[pin] = t
+        return gaps
+
+
+def load_trace(path):
+    with open(path, "rb") as f:
+        if f.read(len(TRACE_MAGIC)) != TRACE_MAGIC:
+            raise ValueError(f"{path} is not a trigger trace")
+        (start,) = TRACE_HEADER.unpack(f.read(TRACE_HEADER.size))
+        trace = Trace(start)
+        while True:
+            head = f.read(CHUNK_HEADER.size)
+            if len(head) < CHUNK_HEADER.size:
+                break
+            (count,) = CHUNK_HEADER.unpack(head)
+            body = f.read(count * 10)
+            if len(body) < count * 10:
+                break  # torn final chunk
+            trace.times.frombytes(body[:count * 8])
+            trace.pins.frombytes(body[count * 8:count * 9])
+            trace.levels.frombytes(body[count * 9:])
+    return trace
+
+
+# ------------------------
+# Recorder
+# ------------------------
+class TraceRecorder:
+    """Records raw edge timestamps from gpiozero Button callbacks.
+
+    record() is called on gpiozero's callback thread and only appends to
+    three arrays; a background thread appends the new records to the trace
+    file every flush_interval.
+    """
+
+    def __init__(self, path, flush_interval=1.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.trace = Trace(time.time_ns())
+        self._t0 = time.monotonic_ns()
+        self._flushed = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def record(self, pin, level):
+        t = time.monotonic_ns() - self._t0
+        with self._lock:
+            self.trace.append(t, pin, level)
+
+    def wrap(self, button, pin):
+        # Keep the button's existing handlers and record in front of them
+        pressed, released = button.when_pressed, button.when_released
+
+        def on_pressed():
+            self.record(pin, 1)
+            if pressed:
+                pressed()
+
+        def on_released():
+            self.record(pin, 0)
+            if released:
+                released()
+
+        button.when_pressed = on_pressed
+        button.when_released = on_released
+
+    def start(self):
+        with open(self.path, "wb") as f:
+            f.write(TRACE_MAGIC + TRACE_HEADER.pack(self.trace.start_wall_ns))
+        self._thread = threading.Thread(target=self._run, name="trigger-trace", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            start, end = self._flushed, len(self.trace)
+            times = self.trace.times[start:end]
+            pins = self.trace.pins[start:end]
+            levels = self.trace.levels[start:end]
+        if end == start:
+            return
+        with open(self.path, "ab") as f:
+            f.write(CHUNK_HEADER.pack(end - start) + times.tobytes() + pins.tobytes() + levels.tobytes())
+        self._flushed = end
+
+    def close(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.flush()
+
+
+# ------------------------
+# Replayer
+# ------------------------
+def replay(trace, pin_factory, speed=1.0, on_progress=None):
+    """Drives the trace's edges into MockFactory pins.
+
+    speed=1 replays in real time, speed=100 compresses every gap 100x and
+    speed=0 replays back to back. Edges are applied in recorded order from
+    this thread, so the same trace always produces the same callback order.
+    """
+    pins = {pin: pin_factory.pin(pin) for pin in set(trace.pins)}
+    start = time.perf_counter()
+    for i, (t, pin, level) in enumerate(zip(trace.times, trace.pins, trace.levels)):
+        if speed:
+            delay = start + t / 1e9 / speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        if level:
+            pins[pin].drive_high()
+        else:
+            pins[pin].drive_low()
+        if on_progress and i % 1000 == 0:
+            on_progress(i)
+    return time.perf_counter() - start
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q / 100))] if values else None
+
+
+def print_trace_info(trace, pin1, pin2):
+    duration = trace.times[-1] / 1e9 if len(trace) else 0.0
+    counts = {pin: 0 for pin in set(trace.pins)}
+    for pin, level in zip(trace.pins, trace.levels):
+        counts[pin] += level
+    gaps_ms = [gap / 1e6 for gap in trace.pairs(pin1, pin2)]
+    print(f"[Trace] {len(trace)} edges over {duration:.1f}s, presses per pin: {counts}")
+    if gaps_ms:
+        print(f"[Trace] {len(gaps_ms)} sensor pairs, GPIO{pin1}/GPIO{pin2} spread: "
+              f"p50={_percentile(gaps_ms, 50):.3f} ms  p95={_percentile(gaps_ms, 95):.3f} ms  "
+              f"max={max(gaps_ms):.3f} ms")
+
+
+# ------------------------
+# CLI
+# ------------------------
+def record_main(args):
+    from gpiozero import Button
+    from signal import pause
+
+    recorder = TraceRecorder(args.output).start()
+    buttons = []
+    for pin in args.pins:
+        button = Button(pin, pull_up=args.pull_up, bounce_time=args.bounce_time)
+        recorder.wrap(button, pin)
+        buttons.append(button)
+    print(f"[Ready] Recording edges on GPIO {', '.join(map(str, args.pins))} to {args.output} (Ctrl+C to stop)")
+    try:
+        pause()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        recorder.close()
+        print(f"\n[Trace] Saved {len(recorder.trace)} edges to {args.output}")
+
+
+def replay_main(args):
+    from gpiozero import Device
+    from gpiozero.pins.mock import MockFactory
+
+    trace = load_trace(args.trace)
+    factory = MockFactory()
+    Device.pin_factory = factory
+    print_trace_info(trace, *args.pins)
+
+    if args.target == "update":
+        # The real station core main(), with its camera pointed at the simulator
+        import asyncio
+        from asms import core, plugins
+        from asms.camera_sim import simulator_from_args
+
+        loop = asyncio.new_event_loop()
+        sim = loop.run_until_complete(simulator_from_args(args).start())
+        threading.Thread(target=loop.run_forever, daemon=True).start()
+        core.CAMERA_IP, core.COMMAND_PORT, core.RESULT_PORT = sim.host, sim.port, sim.port
+        core.TRIGGER_ACK = sim.trigger_ack
+        # Keep replayed jobs out of the production logs
+        core.LOG_FILE = None
+        core.events = plugins.Null()
+        core.history = plugins.Null()
+        core.CHECKPOINT_FILE = None
+        if args.speed != 1:
+            # Debouncing on compressed time would swallow real presses
+            core.BOUNCE_TIME = None
+        threading.Thread(target=core.main, args=(["--operator", args.operator],), daemon=True).start()
+        while core.camera is None or not core.camera.connected:
+            time.sleep(0.01)
+        time.sleep(0.2)
+        counter = lambda: sim.stats["passed"]
+    else:
+        from gpiozero import Button
+
+        presses = {"count": 0}
+        buttons = [Button(pin, pull_up=False) for pin in args.pins]
+        for button in buttons:
+            button.when_pressed = lambda: presses.__setitem__("count", presses["count"] + 1)
+        counter = lambda: presses["count"]
+
+    elapsed = replay(trace, factory, args.speed)
+    time.sleep(args.settle)
+    rate = len(trace) / elapsed if elapsed else float("inf")
+    print(f"[Replay] {len(trace)} edges in {elapsed:.2f}s ({rate:.0f} edges/s, {args.speed or 'max'}x)")
+    print(f"[Replay] {args.target}: {counter()} {'jobs passed' if args.target == 'update' else 'presses seen'}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record and replay GPIO trigger traces")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="record Button edges to a trace file")
+    rec.add_argument("-o", "--output", default="triggers.trace")
+    rec.add_argument("--pins", type=int, nargs="+", default=[17, 27])
+    rec.add_argument("--pull-up", action="store_true")
+    rec.add_argument("--bounce-time", type=float, default=None)
+
+    info = sub.add_parser("info", help="summarize a trace file")
+    info.add_argument("trace")
+    info.add_argument("--pins", type=int, nargs=2, default=[17, 27])
+
+    rep = sub.add_parser("replay", help="replay a trace through gpiozero's MockFactory")
+    rep.add_argument("trace")
+    rep.add_argument("--speed", type=float, default=1.0, help="1 = real time, 100 = 100x, 0 = as fast as possible")
+    rep.add_argument("--target", choices=("buttons", "update"), default="buttons",
+                     help="plain Buttons, or the station core's main() against the camera simulator")
+    rep.add_argument("--pins", type=int, nargs=2, default=[17, 27])
+    rep.add_argument("--operator", default="replay")
+    rep.add_argument("--settle", type=float, default=0.5, help="seconds to wait after the last edge")
+    from asms.camera_sim import add_simulator_args
+    add_simulator_args(rep)
+
+    args = parser.parse_args(argv)
+    if args.command == "record":
+        record_main(args)
+    elif args.command == "info":
+        if not os.path.exists(args.trace):
+            parser.error(f"no such trace: {args.trace}")
+        print_trace_info(load_trace(args.trace), *args.pins)
+    else:
+        replay_main(args)
+
+if __name__ == "__main__":
+    main()
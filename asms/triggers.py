@@ -0,0 +1,80 @@
+import sys
+import threading
+
+# ------------------------
+# Trigger Sources
+# ------------------------
+class GpioTriggers:
+    """Sensors on GPIO pins through gpiozero, which is imported only here.
+
+    start() takes one zero-argument handler per pin for presses (and
+    optionally releases); gpiozero calls them on its callback thread.
+    """
+
+    def __init__(self, pins, pull_up=False, bounce_time=None, pin_factory=None):
+        self.pins = tuple(pins)
+        self.pull_up = pull_up
+        self.bounce_time = bounce_time
+        self.pin_factory = pin_factory
+        self.buttons = []
+
+    def start(self, on_pressed, on_released=None):
+        from gpiozero import Button
+
+        for i, pin in enumerate(self.pins):
+            button = Button(pin, pull_up=self.pull_up, bounce_time=self.bounce_time, pin_factory=self.pin_factory)
+            button.when_pressed = on_pressed[i]
+            if on_released:
+                button.when_released = on_released[i]
+            self.buttons.append(button)
+        return self
+
+    def close(self):
+        for button in self.buttons:
+            button.close()
+        self.buttons = []
+
+
+class ManualTriggers:
+    """Sensors driven from code: press(sensor) runs that sensor's handler on the caller's thread."""
+
+    def __init__(self, pins, **options):
+        self.pins = tuple(pins)
+        self.on_pressed = ()
+        self.on_released = None
+
+    def start(self, on_pressed, on_released=None):
+        self.on_pressed = tuple(on_pressed)
+        self.on_released = on_released
+        return self
+
+    def press(self, sensor):
+        self.on_pressed[sensor - 1]()
+
+    def release(self, sensor):
+        if self.on_released:
+            self.on_released[sensor - 1]()
+
+    def close(self):
+        pass
+
+
+class StdinTriggers(ManualTriggers):
+    """Sensors from the keyboard, for running without a Pi.
+
+    Enter presses every sensor; a line of sensor numbers ('1', '2', '1 2')
+    presses just those.
+    """
+
+    def start(self, on_pressed, on_released=None):
+        super().start(on_pressed, on_released)
+        threading.Thread(target=self._read, name="stdin-triggers", daemon=True).start()
+        print(f"[Ready] Keyboard triggers: Enter presses all {len(self.pins)} sensors, or type sensor numbers")
+        return self
+
+    def _read(self):
+        for line in sys.stdin:
+            sensors = [int(s) for s in line.split() if s.isdigit() and 1 <= int(s) <= len(self.pins)]
+            for sensor in sensors or range(1, len(self.pins) + 1):
+                self.press(sensor)
+                self.release(sensor)
@@ -0,0 +1,224 @@
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+
+from asms.camera import AsyncCameraClient, CameraClient, FrameBuffer, build_command, build_trigger_command, decode_frame
+from asms.camera_sim import CameraSimulator
+
+
+def test_whole_frame():
+    assert FrameBuffer().feed(b"\x02PASS\x03") == [b"PASS"]
+
+
+def test_frame_split_over_reads():
+    buf = FrameBuffer()
+    assert buf.feed(b"\x02se") == []
+    assert buf.feed(b"t job") == []
+    assert buf.feed(b" 2 ok\x03") == [b"set job 2 ok"]
+
+
+def test_coalesced_frames_in_one_read():
+    buf = FrameBuffer()
+    assert buf.feed(b"\x02ack\x03\x02result true\x03\x02res") == [b"ack", b"result true"]
+    assert buf.feed(b"ult false\x03") == [b"result false"]
+
+
+def test_unframed_lines_and_empty_frames():
+    buf = FrameBuffer()
+    assert buf.feed(b"true\r\n") == [b"true"]
+    assert buf.feed(b"\x02\x03\r\n") == []
+
+
+def test_garbage_before_stx_is_dropped():
+    assert FrameBuffer().feed(b"noise\x02ok\x03") == [b"ok"]
+
+
+def test_unterminated_garbage_is_bounded():
+    buf = FrameBuffer(max_size=16)
+    assert buf.feed(b"x" * 40) == []
+    assert buf.feed(b"\x02ok\x03") == [b"ok"]
+
+
+def test_overflow_keeps_the_newest_partial_frame():
+    buf = FrameBuffer(max_size=16)
+    assert buf.feed(b"x" * 20 + b"\x02tr") == []
+    assert buf.feed(b"ue\x03") == [b"true"]
+
+
+def test_command_frames_round_trip():
+    buf = FrameBuffer()
+    frames = buf.feed(build_command(7) + build_trigger_command())
+    assert [decode_frame(frame) for frame in frames] == ["set job 7", "trigger"]
+
+
+class FakeCamera:
+    """Two listening sockets the test answers on by hand."""
+
+    def __init__(self):
+        self.servers = [socket.create_server(("127.0.0.1", 0)) for _ in range(2)]
+        self.ports = [server.getsockname()[1] for server in self.servers]
+        self.conns = [None, None]
+        self.threads = [threading.Thread(target=self._accept, args=(i,), daemon=True) for i in range(2)]
+        for thread in self.threads:
+            thread.start()
+
+    def _accept(self, i):
+        self.conns[i], _ = self.servers[i].accept()
+
+    def answer(self, text, link=1):
+        self.conns[link].sendall(b"\x02" + text.encode() + b"\x03")
+
+    def close(self):
+        for sock in self.conns + self.servers:
+            if sock:
+                sock.close()
+
+
+@pytest.fixture
+def camera():
+    fake = FakeCamera()
+    client = CameraClient("127.0.0.1", *fake.ports, backoff_initial=0.01)
+    assert client.start(timeout=2)
+    for thread in fake.threads:
+        thread.join(2)
+    yield fake, client
+    client.close()
+    fake.close()
+
+
+def wait_for(check, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not check():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def trigger(client):
+    return client.send(build_trigger_command(), expect_result=True)
+
+
+def timed_out(client):
+    cmd = trigger(client)
+    assert cmd.wait_result(0.01) is None
+    client.cancel(cmd)
+    return cmd
+
+
+
+def test_acks_and_verdicts_are_matched_in_order(camera):
+    fake, client = camera
+    client.trigger_ack = True
+    switch = client.send(build_command(4))
+    first, second = trigger(client), trigger(client)
+    assert switch.result is None and first.ack is not None
+    for ack in ("set job 4 ok", "ok 1", "ok 2"):
+        fake.answer(ack, link=0)
+    fake.answer("false")
+    fake.answer("true")
+    assert [cmd.wait_ack(2) for cmd in (switch, first, second)] == ["set job 4 ok", "ok 1", "ok 2"]
+    assert first.wait_result(2) == "false" and second.wait_result(2) == "true"
+    assert client.unmatched == 0
+
+
+def test_trigger_without_ack_waits_only_for_its_verdict(camera):
+    fake, client = camera
+    switch = client.send(build_command(2))
+    cmd = trigger(client)
+    assert cmd.ack is None
+    fake.answer("ok", link=0)
+    fake.answer("true")
+    assert switch.wait_ack(2) == "ok" and cmd.wait_result(2) == "true"
+
+
+def test_request_gives_up_on_a_missing_ack(camera):
+    fake, client = camera
+    assert client.request(build_command(1), timeout=0.01) is None
+    assert client.health()["command"]["in_flight"] == 0
+    fake.answer("ok", link=0)  # the late ack is swallowed, not left for the next request
+    wait_for(lambda: client.late == 1)
+    switch = client.send(build_command(2))
+    fake.answer("set job 2 ok", link=0)
+    assert switch.wait_ack(2) == "set job 2 ok"
+
+
+def test_unexpected_frames_are_counted(camera):
+    fake, client = camera
+    fake.answer("true")
+    wait_for(lambda: client.unmatched == 1)
+
+
+def test_lost_channel_fails_waiting_commands(camera):
+    fake, client = camera
+    cmd = trigger(client)
+    fake.conns[1].close()
+    with pytest.raises(ConnectionError):
+        cmd.result.result(2)
+
+
+def test_send_needs_a_connection():
+    with pytest.raises(ConnectionError):
+        CameraClient("127.0.0.1", 1, 1).send(build_trigger_command(), expect_result=True)
+
+
+def test_async_client_against_the_simulator():
+    async def run():
+        sim = await CameraSimulator(trigger_ack=False, inspection_latency=0.05, jitter=0).start()
+        client = AsyncCameraClient("127.0.0.1", sim.port, sim.port)
+        try:
+            assert await client.start(2)
+            assert await client.request(build_command(3), 1) == "ok"
+            cmd = client.send(build_trigger_command(), expect_result=True)
+            assert await cmd.wait_result(1) == "true"
+            # Give up on the next verdict; it arrives late and is swallowed
+            late = client.send(build_trigger_command(), expect_result=True)
+            assert await late.wait_result(0.001) is None
+            client.cancel(late)
+            assert client.health()["result"]["in_flight"] == 0
+            await asyncio.sleep(0.1)
+            assert client.late == 1 and client.unmatched == 0
+        finally:
+            await client.close()
+            await sim.close()
+
+    asyncio.run(run())
+
+def test_late_verdict_lands_on_the_tombstone(camera):
+    fake, client = camera
+    first = trigger(client)
+    time.sleep(0.2)  # the camera's fastest answer: 200 ms
+    fake.answer("true")
+    assert first.wait_result(2) == "true"
+    late = timed_out(client)
+    retry = trigger(client)
+    fake.answer("false")  # the cancelled trigger's verdict, arriving late
+    wait_for(lambda: client.late == 1)
+    assert not retry.result.done() and late.result.cancelled()
+    fake.answer("true")
+    assert retry.wait_result(2) == "true"
+    assert client.unmatched == 0
+
+
+def test_lost_verdict_drops_the_tombstone(camera):
+    fake, client = camera
+    first = trigger(client)
+    fake.answer("true")
+    assert first.wait_result(2) == "true"
+    timed_out(client)
+    retry = trigger(client)
+    time.sleep(0.05)  # longer than any answer so far: this one is the retry's
+    fake.answer("true")
+    assert retry.wait_result(2) == "true"
+    assert client.late == 0 and client.health()["result"]["in_flight"] == 0
+
+
+def test_expired_tombstone_swallows_nothing(camera):
+    fake, client = camera
+    client.late_window = 0.01
+    timed_out(client)
+    time.sleep(0.05)
+    fake.answer("true")
+    wait_for(lambda: client.unmatched == 1)
+    assert client.late == 0
@@ -0,0 +1,89 @@
+import json
+import logging
+import os
+import time
+
+import pytest
+
+from asms import eventlog, historydb, jobs, kpi, stage_metrics
+from asms.checkpoint import Checkpoint
+from asms.recipes import Recipe
+from asms.retry_scheduler import RetryScheduler
+
+
+def test_updates_are_merged_and_written_on_close(tmp_path):
+    path = str(tmp_path / "a.checkpoint.json")
+    checkpoint = Checkpoint(path)
+    checkpoint.update(step=1, job=2)
+    checkpoint.update(step=2)
+    checkpoint.close()
+    state = Checkpoint(path).load()
+    assert state["step"] == 2 and state["job"] == 2 and "saved_at" in state
+    assert checkpoint.writes == 1
+    assert os.listdir(tmp_path) == ["a.checkpoint.json"]
+
+
+def test_writer_thread_writes_the_newest_state(tmp_path):
+    path = str(tmp_path / "a.checkpoint.json")
+    checkpoint = Checkpoint(path).start()
+    for step in range(50):
+        checkpoint.update(step=step)
+    checkpoint.close()
+    assert Checkpoint(path).load()["step"] == 49
+    assert 1 <= checkpoint.writes <= 50
+
+
+def test_failed_write_leaves_the_old_checkpoint(tmp_path, monkeypatch):
+    path = str(tmp_path / "a.checkpoint.json")
+    checkpoint = Checkpoint(path)
+    checkpoint.update(step=1)
+    checkpoint.close()
+
+    def crash(src, dst):
+        raise OSError("power lost")
+
+    checkpoint.update(step=2)
+    monkeypatch.setattr(os, "replace", crash)
+    with pytest.raises(OSError):
+        checkpoint.close()
+    monkeypatch.undo()
+    assert Checkpoint(path).load()["step"] == 1
+
+
+def test_missing_unreadable_or_stale_checkpoints_are_ignored(tmp_path):
+    path = tmp_path / "a.checkpoint.json"
+    assert Checkpoint(str(path)).load() is None
+    path.write_text("{not json")
+    assert Checkpoint(str(path)).load() is None
+    path.write_text(json.dumps({"step": 1, "saved_at": time.time() - 120}))
+    assert Checkpoint(str(path)).load(max_age=60) is None
+    assert Checkpoint(str(path)).load()["step"] == 1
+
+
+def make_book(tmp_path, recipe, checkpoint):
+    return jobs.JobBook(recipe, RetryScheduler(), stage_metrics.StageTimer(),
+                        eventlog.EventLog(str(tmp_path / "events.jsonl")),
+                        historydb.HistoryStore(str(tmp_path / "history.db")), kpi.KpiAggregator(),
+                        logging.getLogger("test.checkpoint"), checkpoint=checkpoint)
+
+
+def test_book_resumes_where_it_stopped(tmp_path):
+    path = str(tmp_path / "a.checkpoint.json")
+    recipe = Recipe("r", [4, 5, 6]).compile()
+    book = make_book(tmp_path, recipe, Checkpoint(path))
+    book.resume(None)
+    book.step, book.cycle_jobs = 1, 1
+    book.scheduler.cycle_retries = 3
+    book.save_progress(attempt=2)
+    book.checkpoint.close()
+
+    saved = Checkpoint(path).load(max_age=60)
+    resumed = make_book(tmp_path, recipe, Checkpoint(path))
+    assert resumed.resume(saved)
+    assert (resumed.step, resumed.current_job, resumed.cycle_jobs, resumed.resume_attempt) == (1, 5, 1, 2)
+    assert resumed.cycle_start == book.cycle_start and resumed.scheduler.cycle_retries == 3
+
+    # Another job sequence starts a fresh cycle
+    other = make_book(tmp_path, Recipe("r", [4, 6]).compile(), Checkpoint(path))
+    assert not other.resume(saved)
+    assert other.step == 0 and other.cycle_start is not None
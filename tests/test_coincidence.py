@@ -0,0 +1,91 @@
+from asms.coincidence import PAIRED, PENDING, REJECTED, CoincidenceDetector
+
+MS = 1_000_000  # ns
+
+
+def make(window=0.5):
+    pairs = []
+    detector = CoincidenceDetector(window, lambda t1, t2: pairs.append((t1, t2)))
+    return detector, pairs
+
+
+def test_pair_within_window():
+    detector, pairs = make()
+    assert detector.edge(1, 1000 * MS) == PENDING
+    assert detector.edge(2, 1100 * MS) == PAIRED
+    assert pairs == [(1000 * MS, 1100 * MS)]
+    assert detector.last_spread_ns == 100 * MS
+    assert not detector.armed
+
+
+def test_pair_passes_sensor_times_in_sensor_order():
+    detector, pairs = make()
+    detector.edge(2, 1000 * MS)
+    detector.edge(1, 1200 * MS)
+    assert pairs == [(1200 * MS, 1000 * MS)]
+    assert detector.last_spread_ns == 200 * MS
+
+
+def test_edge_outside_window_is_unpaired():
+    detector, pairs = make()
+    detector.edge(1, 1000 * MS)
+    assert detector.edge(2, 1501 * MS) == PENDING
+    assert pairs == []
+    assert detector.stats["unpaired"] == 1
+    # The late edge now waits for its own partner
+    assert detector.edge(1, 1600 * MS) == PAIRED
+    assert pairs == [(1600 * MS, 1501 * MS)]
+
+
+def test_edge_on_window_boundary_pairs():
+    detector, _ = make()
+    detector.edge(1, 1000 * MS)
+    assert detector.edge(2, 1500 * MS) == PAIRED
+
+
+def test_no_window_pairs_any_spread():
+    detector, _ = make(window=None)
+    detector.edge(1, 1 * MS)
+    assert detector.edge(2, 3600_000 * MS) == PAIRED
+
+
+def test_repeat_of_same_sensor_supersedes():
+    detector, pairs = make()
+    detector.edge(1, 1000 * MS)
+    assert detector.edge(1, 1200 * MS) == PENDING
+    detector.edge(2, 1300 * MS)
+    assert pairs == [(1200 * MS, 1300 * MS)]
+    assert detector.stats["unpaired"] == 1
+
+
+def test_edges_while_disarmed_are_rejected_and_counted():
+    detector, pairs = make()
+    detector.edge(1, 1000 * MS)
+    detector.edge(2, 1010 * MS)
+    assert detector.edge(1, 1020 * MS) == REJECTED
+    assert detector.edge(2, 1030 * MS) == REJECTED
+    detector.arm()
+    detector.edge(2, 2000 * MS)
+    assert detector.edge(1, 2010 * MS) == PAIRED
+    assert len(pairs) == 2
+    assert detector.stats == {"edges": 6, "paired": 2, "rejected": 2, "unpaired": 0}
+
+
+def test_arm_and_disarm_clear_pending_edges():
+    detector, pairs = make()
+    detector.edge(1, 1000 * MS)
+    detector.disarm()
+    assert detector.edge(2, 1010 * MS) == REJECTED
+    detector.arm()
+    assert detector.edge(2, 1020 * MS) == PENDING
+    assert pairs == []
+
+
+def test_snapshot():
+    detector, _ = make(window=0.25)
+    detector.edge(1, 1000 * MS)
+    detector.edge(2, 1012 * MS)
+    snap = detector.snapshot()
+    assert snap["window_ms"] == 250.0
+    assert snap["last_spread_ms"] == 12.0
+    assert snap["paired"] == 1 and snap["armed"] is False
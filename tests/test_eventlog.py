@@ -0,0 +1,75 @@
+import json
+import threading
+
+from asms import eventlog
+from asms.eventlog import EventLog, read_binary_events
+
+
+def lines(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_jsonl_records_carry_names_fields_and_context(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    log = EventLog(path, context={"station": "a"}).start()
+    log.emit(eventlog.TRIGGER_SENT, 4, 2)
+    log.emit(eventlog.SESSION)
+    log.close()
+    trigger, session = lines(path)
+    assert trigger["event"] == "trigger_sent" and trigger["job"] == 4 and trigger["attempt"] == 2
+    assert trigger["station"] == "a"
+    assert session["event"] == "session" and "job" not in session
+    assert log.health() == {"emitted": 2, "written": 2, "pending": 0, "dropped": 0}
+
+
+def test_binary_records_round_trip(tmp_path):
+    path = str(tmp_path / "events.bin")
+    log = EventLog(path, fmt="binary").start()
+    log.emit(eventlog.JOB_DONE, 3, 1)
+    log.close()
+    (record,) = read_binary_events(path)
+    assert record["event"] == "job_done" and record["job"] == 3 and record["retries"] == 1
+
+
+def test_rotation_keeps_the_configured_backups(tmp_path):
+    path = tmp_path / "events.jsonl"
+    log = EventLog(str(path), max_bytes=300, backups=2).start()
+    for job in range(12):
+        log.emit(eventlog.JOB_SWITCH, job)
+        log._flush()
+    log.close()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["events.jsonl", "events.jsonl.1", "events.jsonl.2"]
+    assert all(p.stat().st_size <= 300 for p in tmp_path.iterdir())
+    newest = [record["job"] for record in lines(path)]
+    assert newest[-1] == 11
+    assert [record["job"] for record in lines(f"{path}.1")][-1] == newest[0] - 1
+
+
+def test_overflow_drops_the_oldest_and_counts_them(tmp_path):
+    log = EventLog(str(tmp_path / "events.jsonl"), max_pending=4)
+    for job in range(10):
+        log.emit(eventlog.JOB_SWITCH, job)
+    assert log.health() == {"emitted": 10, "written": 0, "pending": 4, "dropped": 6}
+    log.start()
+    log.close()
+    assert [record["job"] for record in lines(tmp_path / "events.jsonl")] == [6, 7, 8, 9]
+    assert log.written == 4 and log.dropped == 6
+
+
+def test_emit_from_several_threads_counts_every_event(tmp_path):
+    log = EventLog(str(tmp_path / "events.jsonl"), max_pending=1000, flush_interval=0.001).start()
+
+    def emit():
+        for job in range(5000):
+            log.emit(eventlog.SENSOR, 1, job)
+
+    threads = [threading.Thread(target=emit) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    log.close()
+    assert log.emitted == 20000
+    assert log.written + log.dropped == 20000
+    assert len(lines(tmp_path / "events.jsonl")) == log.written
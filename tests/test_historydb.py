@@ -0,0 +1,14 @@
+from asms.historydb import connect, import_logs
+
+
+def test_import_marks_abandoned_jobs_failed(tmp_path):
+    log = tmp_path / "job_pass_log.txt"
+    log.write_text(
+        "2025-07-10 08:00:00.100000    Job 1 completed by s in 0.75s with 0 retries\n"
+        "2025-07-10 08:00:02.000000    Job 2 abandoned by s after 3 attempts (cam2 not passed)\n"
+    )
+    conn = connect(str(tmp_path / "history.db"))
+    assert import_logs(conn, [str(log)])[str(log)] == (2, 0, 0)
+    assert conn.execute("SELECT job, retries, passed FROM jobs ORDER BY ts").fetchall() == [(1, 0, 1), (2, 2, 0)]
+    # Already imported: skipped
+    assert import_logs(conn, [str(log)])[str(log)] is None
@@ -0,0 +1,58 @@
+import logging
+import time
+
+from asms import eventlog, historydb, jobs, kpi, stage_metrics
+from asms.recipes import Recipe
+from asms.retry_scheduler import RetryScheduler
+
+MS = 1_000_000  # ns
+
+
+def make_book(tmp_path, budgets):
+    recipe = Recipe("r", [1, 2]).compile()
+    book = jobs.JobBook(recipe, RetryScheduler(), stage_metrics.StageTimer(),
+                        eventlog.EventLog(str(tmp_path / "events.jsonl")),
+                        historydb.HistoryStore(str(tmp_path / "history.db")), kpi.KpiAggregator(),
+                        logging.getLogger("test.jobs"), budgets=budgets)
+    book.resume(None)
+    alarms = []
+    book.budget.on_alarm = lambda job, stage, value, limit: alarms.append((job, stage))
+    return book, alarms
+
+
+def test_elapsed_runs_open_stages_up_to_now():
+    timer = stage_metrics.StageTimer()
+    timer.stamp(stage_metrics.DUAL, 100 * MS)
+    timer.stamp_trigger(110 * MS)
+    elapsed = timer.elapsed(400 * MS)
+    assert elapsed["dual_to_trigger"] == 10.0
+    assert elapsed["inspection"] == 290.0 and elapsed["dual_to_verdict"] == 300.0
+    assert elapsed["switch_ack"] is None
+    assert timer.current[stage_metrics.DUAL] == 100 * MS  # not committed
+
+
+def test_timeouts_alarm_once_per_part(tmp_path):
+    book, alarms = make_book(tmp_path, {"inspection": 1.0})
+    for attempt in (1, 2):
+        book.stages.stamp_trigger()
+        time.sleep(0.005)
+        assert book.verdict(1, attempt, None, 0.005, 0.005) == jobs.NO_RESULT
+    assert alarms == [(1, "inspection")]
+    book.abandon(1, 2, time.time())
+    book.stages.stamp_trigger()
+    time.sleep(0.005)
+    book.verdict(1, 1, None, 0.005, 0.005)
+    assert alarms == [(1, "inspection")] * 2  # a new part alarms again
+
+
+def test_abandon_checks_the_running_cycle(tmp_path):
+    book, alarms = make_book(tmp_path, {"cycle": 1.0})
+    book.cycle_start = time.time() - 1
+    book.abandon(1, 3, time.time())
+    book.abandon(1, 3, time.time())
+    assert alarms == [(1, "cycle")]
+    book.finish_cycle(1)  # already alarmed for this cycle
+    assert alarms == [(1, "cycle")]
+    book.cycle_start = time.time() - 1
+    book.abandon(2, 3, time.time())
+    assert alarms == [(1, "cycle"), (2, "cycle")]
@@ -0,0 +1,176 @@
+import json
+import math
+import shutil
+from pathlib import Path
+
+from asms.log_analytics import UNKNOWN, LogIndex, LogParser
+
+REPO = Path(__file__).resolve().parent.parent
+
+
+def parse(*lines):
+    parser = LogParser([])
+    for line in lines:
+        parser.feed(line)
+    return parser
+
+
+def rows(table):
+    return [dict(zip(table.columns, values)) for values in zip(*table.columns.values())]
+
+
+def same(a, b):
+    # NaN-safe comparison of whole tables
+    return {name: col.tobytes() for name, col in a.columns.items()} == {name: col.tobytes() for name, col in b.columns.items()}
+
+
+def test_job_formats():
+    parser = parse(
+        "2025-06-12 17:08:28,739 Job 1 PASSED",
+        "2025-06-12 17:08:30,000 Job 2 PASSED in 0.85 seconds",
+        "2025-07-09 10:45:57,300 Job 1 passed by operator qw in 1.05 seconds",
+        "2025-07-09 12:05:15 Job 2 passed by d in 2.21s with 1 retries at 2025-07-09 12:05:15",
+        "2025-07-10 08:00:00.123456    Job 3 completed by vikram in 0.75s with 0 retries",
+    )
+    jobs = rows(parser.jobs)
+    assert [row["job"] for row in jobs] == [1, 2, 1, 2, 3]
+    assert math.isnan(jobs[0]["duration"]) and jobs[1]["duration"] == 0.85
+    assert [row["retries"] for row in jobs] == [UNKNOWN, UNKNOWN, UNKNOWN, 1, 0]
+    assert [parser.operators[row["operator"]] for row in jobs[2:]] == ["qw", "d", "vikram"]
+
+
+def test_cycle_line_names_the_operator_of_earlier_jobs():
+    parser = parse(
+        "2025-06-12 17:18:09,235 Job 1 PASSED",
+        "2025-06-12 17:18:16,432 Job 2 PASSED",
+        "2025-06-12 17:18:23,941 Cycle 1 completed by kl in 19.03 seconds",
+        "2025-07-09 10:46:42,670 Cycle completed by operator qw in 50.72 seconds",
+        "2025-07-10 08:00:00    Cycle of 3 jobs completed by s in 4.20 seconds",
+    )
+    assert [parser.operators[row["operator"]] for row in rows(parser.jobs)] == ["kl", "kl"]
+    cycles = rows(parser.cycles)
+    assert [row["duration"] for row in cycles] == [19.03, 50.72, 4.2]
+    assert [row["jobs"] for row in cycles] == [UNKNOWN, UNKNOWN, 3]
+
+
+def test_stage_lines():
+    parser = parse(
+        "Sensor 1 (GPIO17) pulse detected at 2025-07-10 08:00:00.000",
+        "Sensor 2 (GPIO27) pulse detected at 2025-07-10 08:00:00.010",
+        "Both sensors triggered — proceeding to job at 2025-07-10 08:00:00.012",
+        "Job 1 switch command sent at 2025-07-10 08:00:00.013",
+        "Job 1 loaded at 2025-07-10 08:00:00.020",
+        "Trigger command sent at 2025-07-10 08:00:00.022",
+        "Trigger command sent at 2025-07-10 08:00:00.100",
+        "2025-07-10 08:00:00.160    Job 1 completed by s in 0.16s with 1 retries",
+    )
+    (stage,) = rows(parser.stages)
+    assert stage["attempts"] == 2
+    assert round(stage["sensor_spread"], 3) == 10.0
+    assert round(stage["dual_to_trigger"], 3) == 10.0
+    assert round(stage["switch_ack"], 3) == 7.0
+    assert round(stage["trigger_to_verdict"], 3) == 60.0
+
+
+def test_event_log_stages():
+    events = [
+        {"event": "session", "mono_ns": 0},
+        {"event": "sensor", "sensor": 1, "mono_ns": 1_000_000_000},
+        {"event": "sensor", "sensor": 2, "mono_ns": 1_004_000_000},
+        {"event": "dual_trigger", "mono_ns": 1_005_000_000},
+        {"event": "trigger_sent", "mono_ns": 1_006_000_000},
+        {"event": "verdict_pass", "job": 2, "operator": "s", "ts": "2025-07-10T08:00:01", "mono_ns": 1_056_000_000},
+        "not json",
+    ]
+    parser = parse(*(e if isinstance(e, str) else json.dumps(e) for e in events))
+    (stage,) = rows(parser.stages)
+    assert stage["job"] == 2 and round(stage["trigger_to_verdict"], 3) == 50.0
+    assert len(parser.jobs) == 0
+
+
+def test_snapshot_round_trip():
+    parser = parse("2025-06-12 17:08:28,739 Job 1 PASSED", "Sensor 1 (GPIO17) pulse detected at 2025-07-10 08:00:00.000")
+    restored = LogParser.restore(parser.operators, json.loads(json.dumps(parser.snapshot())))
+    assert same(restored.jobs, parser.jobs)
+    assert restored.sensor == parser.sensor and restored.unassigned == parser.unassigned
+
+
+def copy_logs(tmp_path):
+    for name in ("job_pass_log.txt", "job_cycle_log.txt"):
+        shutil.copy(REPO / name, tmp_path / name)
+    return [str(tmp_path / "job_pass_log.txt"), str(tmp_path / "job_cycle_log.txt")]
+
+
+def named(index):
+    # Operator codes depend on what else the index has seen; compare names
+    # (repr keeps NaN == NaN)
+    return [[repr({**row, "operator": index.operators[row["operator"]] if row["operator"] >= 0 else None})
+             for row in rows(table)] for table in index.tables()]
+
+
+def assert_same_tables(a, b):
+    assert named(a) == named(b)
+
+
+def test_index_matches_full_parse(tmp_path):
+    paths = copy_logs(tmp_path)
+    index_file = str(tmp_path / "index.json")
+    LogIndex(index_file).update(paths)
+    assert_same_tables(LogIndex(index_file).update(paths), LogIndex().update(paths))
+
+
+def test_index_reads_appended_lines(tmp_path):
+    paths = copy_logs(tmp_path)
+    index_file = str(tmp_path / "index.json")
+    LogIndex(index_file).update(paths)
+    with open(paths[0], "a") as f:
+        f.write("2025-07-11 09:00:00.000000    Job 2 completed by new in 1.50s with 2 retries\n")
+        f.write("2025-07-11 09:00:01.000000    Job 3 compl")  # partial line, not read yet
+    indexed = LogIndex(index_file).update(paths)
+    assert_same_tables(indexed, LogIndex().update(paths))
+    assert indexed.operators.index("new") in [row["operator"] for row in rows(indexed.tables()[0])]
+
+
+def test_index_report_covers_only_requested_files(tmp_path):
+    paths = copy_logs(tmp_path)
+    other = tmp_path / "other.txt"
+    other.write_text("2025-07-11 09:00:00.000000    Job 9 completed by x in 1.00s with 0 retries\n")
+    index_file = str(tmp_path / "index.json")
+    LogIndex(index_file).update(paths)
+    jobs, _, _ = LogIndex(index_file).update([str(other)]).tables()
+    assert [row["job"] for row in rows(jobs)] == [9]
+    assert_same_tables(LogIndex(index_file).update([str(other)]), LogIndex().update([str(other)]))
+
+
+def test_index_drops_deleted_and_reparses_rewritten_files(tmp_path):
+    paths = copy_logs(tmp_path)
+    index_file = str(tmp_path / "index.json")
+    LogIndex(index_file).update(paths)
+    Path(paths[1]).unlink()
+    Path(paths[0]).write_text("2025-07-11 09:00:00.000000    Job 4 completed by y in 1.00s with 0 retries\n")
+    index = LogIndex(index_file).update(paths)
+    assert list(index.files) == [paths[0]]
+    assert [row["job"] for row in rows(index.tables()[0])] == [4]
+    assert list(json.loads(Path(index_file).read_text())["files"]) == [paths[0]]
+
+
+def test_unreadable_index_starts_over(tmp_path):
+    paths = copy_logs(tmp_path)
+    index_file = tmp_path / "index.json"
+    index_file.write_text("{not json")
+    assert_same_tables(LogIndex(str(index_file)).update(paths), LogIndex().update(paths))
+
+
+def test_abandoned_jobs_are_failed_rows():
+    parser = parse(
+        "2025-07-10 08:00:00.100000    Job 1 completed by s in 0.75s with 0 retries",
+        "Trigger command sent at 2025-07-10 08:00:01.000",
+        "2025-07-10 08:00:02.000000    Job 2 abandoned by s after 3 attempts",
+        "2025-07-10 08:00:03.000000    Job 2 abandoned by s after 10 attempts (cam1, cam2 not passed)",
+    )
+    jobs = rows(parser.jobs)
+    assert [row["passed"] for row in jobs] == [1, 0, 0]
+    assert [row["retries"] for row in jobs] == [0, 2, 9]
+    assert math.isnan(jobs[1]["duration"])
+    assert parser.operators[jobs[2]["operator"]] == "s"
+    assert len(parser.stages) == 0
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from asms.camera import build_command, build_trigger_command
+from asms.recipes import Recipe, load_recipe, load_recipes
+
+
+def test_compile_builds_per_step_tables():
+    recipe = Recipe("r", ["4", 5, 4], result_timeout=2.0, job_timeouts={5: 8}).compile()
+    assert recipe.jobs == (4, 5, 4)
+    assert recipe.cycle_length == 3
+    assert len(recipe) == 3
+    assert recipe.switch_frames == (build_command(4), build_command(5), build_command(4))
+    assert recipe.trigger_frame == build_trigger_command()
+    assert recipe.job_timeouts == {4: 2.0, 5: 8.0}
+
+
+def test_steps_wrap_around():
+    recipe = Recipe("r", [1, 2, 3]).compile()
+    assert [recipe.next_step(step) for step in range(3)] == [1, 2, 0]
+
+
+def test_explicit_cycle_length_and_describe():
+    recipe = Recipe("two-sided", [4, 5], cycle_length=4).compile()
+    assert recipe.cycle_length == 4
+    assert recipe.describe() == "two-sided: jobs 4, 5 (cycle of 4)"
+
+
+def test_recipe_without_jobs_is_rejected():
+    with pytest.raises(ValueError):
+        Recipe("empty", []).compile()
+
+
+def write_recipes(path, active=None):
+    data = {"recipes": [
+        {"name": "a", "jobs": [1, 2]},
+        {"name": "b", "jobs": [7], "result_timeout": 3.0, "job_timeouts": {"7": 9.0}},
+    ]}
+    if active:
+        data["active"] = active
+    path.write_text(json.dumps(data))
+    return str(path)
+
+
+def test_load_recipes_converts_job_keys(tmp_path):
+    recipes, active = load_recipes(write_recipes(tmp_path / "recipes.json", active="b"))
+    assert active == "b"
+    assert recipes["b"].job_timeouts == {7: 9.0}
+
+
+def test_load_recipe_picks_named_active_or_first(tmp_path):
+    path = write_recipes(tmp_path / "recipes.json", active="b")
+    assert load_recipe(path).name == "b"
+    assert load_recipe(path, "a").jobs == (1, 2)
+    assert load_recipe(write_recipes(tmp_path / "plain.json")).name == "a"
+    assert load_recipe(path).job_timeouts == {7: 9.0}
+
+
+def test_load_recipe_unknown_name(tmp_path):
+    with pytest.raises(ValueError, match="No recipe 'c'"):
+        load_recipe(write_recipes(tmp_path / "recipes.json"), "c")
+
+
+def test_missing_file_falls_back_to_default_jobs(tmp_path):
+    recipe = load_recipe(str(tmp_path / "none.json"), default_jobs=(3, 1))
+    assert recipe.name == "default"
+    assert recipe.jobs == (3, 1)
+
+
+def test_named_recipe_needs_its_file(tmp_path):
+    with pytest.raises(ValueError, match="'two-sided' requested"):
+        load_recipe(str(tmp_path / "none.json"), "two-sided")
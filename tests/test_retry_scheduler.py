@@ -0,0 +1,85 @@
+import pytest
+
+from asms.retry_scheduler import RetryScheduler
+
+
+def learned(scheduler, job, seconds, n=None):
+    for _ in range(n or scheduler.warmup):
+        scheduler.observe(job, seconds)
+
+
+def test_initial_deadline_until_warmup():
+    scheduler = RetryScheduler(initial_timeout=2.0, warmup=3, timeouts={5: 8.0})
+    assert scheduler.timeout(1) == 2.0
+    assert scheduler.timeout(5) == 8.0
+    learned(scheduler, 1, 0.1, n=2)
+    assert scheduler.timeout(1) == 2.0
+
+
+def test_learned_deadline_tracks_latency():
+    scheduler = RetryScheduler(initial_timeout=5.0, warmup=5)
+    learned(scheduler, 1, 0.1, n=20)
+    deadline = scheduler.timeout(1)
+    assert 0.1 < deadline < 1.0
+    # Other jobs keep their own (unlearned) deadline
+    assert scheduler.timeout(2) == 5.0
+
+
+def test_deadline_is_clamped():
+    scheduler = RetryScheduler(initial_timeout=1.0, min_timeout=0.05, warmup=5)
+    learned(scheduler, 1, 0.001, n=20)
+    assert scheduler.timeout(1) == 0.05
+    learned(scheduler, 2, 3.0)
+    assert scheduler.timeout(2) == 1.0  # never above the job's initial deadline
+    scheduler = RetryScheduler(initial_timeout=1.0, max_timeout=0.5)
+    assert scheduler.timeout(1) == 0.5
+
+
+def test_timeouts_double_the_deadline_until_an_answer():
+    scheduler = RetryScheduler(initial_timeout=5.0, warmup=5)
+    learned(scheduler, 1, 0.1, n=20)
+    base = scheduler.timeout(1)
+    scheduler.timed_out(1)
+    assert scheduler.timeout(1) == pytest.approx(base * 2)
+    scheduler.timed_out(1)
+    assert scheduler.timeout(1) == pytest.approx(base * 4)
+    scheduler.observe(1, 0.1)
+    assert scheduler.timeout(1) == pytest.approx(base, rel=0.1)
+
+
+def test_drift_is_reported_once():
+    scheduler = RetryScheduler(warmup=5, drift_ratio=0.25)
+    learned(scheduler, 1, 0.1, n=10)
+    drifts = [scheduler.observe(1, 0.3) for _ in range(10)]
+    reported = [d for d in drifts if d]
+    assert len(reported) >= 1
+    previous, current = reported[0]
+    assert previous == pytest.approx(0.1, rel=0.1) and current > previous * 1.25
+    assert drifts[-1] is None
+
+
+def test_max_attempts_per_job():
+    scheduler = RetryScheduler(max_attempts=3, cycle_retry_budget=100)
+    assert scheduler.allow_retry(1, 1)
+    assert scheduler.allow_retry(1, 2)
+    assert not scheduler.allow_retry(1, 3)
+    assert scheduler.cycle_retries == 2
+
+
+def test_cycle_retry_budget():
+    scheduler = RetryScheduler(max_attempts=10, cycle_retry_budget=3)
+    assert all(scheduler.allow_retry(job, 1) for job in (1, 2, 3))
+    # Budget spent: every job gets a single attempt until the cycle ends
+    assert not scheduler.allow_retry(4, 1)
+    scheduler.end_cycle()
+    assert scheduler.cycle_retries == 0
+    assert scheduler.allow_retry(4, 1)
+
+
+def test_snapshot():
+    scheduler = RetryScheduler(cycle_retry_budget=7)
+    learned(scheduler, 2, 0.05)
+    snap = scheduler.snapshot()
+    assert snap["cycle_retry_budget"] == 7
+    assert snap["jobs"]["2"]["n"] == scheduler.warmup
+    assert snap["jobs"]["2"]["ewma_ms"] == 50.0
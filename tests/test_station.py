@@ -0,0 +1,55 @@
+import asyncio
+import json
+import logging
+
+from asms import historydb
+from asms.station import Station, StationConfig, load_station_configs, setup_station_logging
+
+
+def test_recipe_file_is_relative_to_the_stations_file(tmp_path, monkeypatch):
+    config_dir = tmp_path / "line"
+    config_dir.mkdir()
+    path = config_dir / "stations.json"
+    path.write_text(json.dumps({"stations": [
+        {"name": "a"},
+        {"name": "b", "recipe": "two-sided", "recipe_file": "products/recipes.json"},
+        {"name": "c", "recipe_file": str(tmp_path / "abs.json")},
+    ]}))
+    monkeypatch.chdir(tmp_path)
+    a, b, c = load_station_configs("line/stations.json")
+    assert a.recipe_file == str(config_dir / "recipes.json")
+    assert b.recipe_file == str(config_dir / "products" / "recipes.json")
+    assert c.recipe_file == str(tmp_path / "abs.json")
+
+
+def test_job_logs_are_written_off_the_loop(tmp_path):
+    log = str(tmp_path / "job_pass_log.txt")
+    listeners = setup_station_logging([StationConfig("a", log_file=log), StationConfig("b", log_file=log)])
+    assert len(listeners) == 1
+    try:
+        logging.getLogger("station.a").info("Job 1 completed")
+        logging.getLogger("station.b").info("Job 2 completed")
+    finally:
+        for listener in listeners:
+            listener.stop()
+        for name in ("station.a", "station.b"):
+            logging.getLogger(name).handlers.clear()
+    with open(log) as f:
+        assert f.read().splitlines() == ["Job 1 completed", "Job 2 completed"]
+
+
+class BrokenCamera:
+    def send(self, payload, expect_result=False):
+        raise RuntimeError("bad frame")
+
+
+def test_job_error_fails_only_that_part(tmp_path):
+    config = StationConfig("a", event_log=str(tmp_path / "events.jsonl"),
+                           checkpoint=str(tmp_path / "a.checkpoint.json"))
+    history = historydb.HistoryStore(str(tmp_path / "history.db"))
+    station = Station(config, camera=BrokenCamera(), history=history)
+    station.loaded_job = station.recipe.jobs[0]
+    try:
+        assert asyncio.run(station.run_job(0)) is False
+    finally:
+        station.events.close()